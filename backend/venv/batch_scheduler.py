@@ -0,0 +1,142 @@
+# agendador de inferência em lotes (micro-batching) compartilhado entre requisições
+#
+# Em vez de cada requisição /resumir chamar o modelo uma vez por chunk (lotes de 1),
+# todos os chunks das requisições em andamento entram numa única fila. Uma thread
+# dedicada agrupa os chunks em lotes de tamanho parecido (menos padding) e chama a
+# função de geração uma vez por lote. Cada chunk recebe um Future, então o resultado
+# volta para a requisição certa e na ordem certa.
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class BatchScheduler:
+    """
+    Agrupa itens de várias requisições em lotes e executa batch_fn uma vez por lote.
+    - batch_fn(textos, **params): recebe lista de textos e devolve lista de resultados (mesma ordem).
+    - max_batch_size: número máximo de itens por chamada a batch_fn.
+    - max_wait_ms: tempo máximo que o primeiro item da fila espera por companheiros de lote.
+    - length_fn: mede o "tamanho" de um item (usado para agrupar itens parecidos).
+    """
+
+    def __init__(self, batch_fn, max_batch_size=8, max_wait_ms=20, length_fn=len):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms) / 1000.0)
+        self.length_fn = length_fn
+
+        # fila de pendentes: cada item é (texto, chave_params, params, future)
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # thread daemon: não impede o processo de terminar
+        self._thread = threading.Thread(target=self._loop, name="batch-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts, batch_limit=None, **params):
+        """
+        Enfileira uma lista de textos com os mesmos parâmetros de geração.
+        Retorna uma lista de Futures na mesma ordem dos textos.
+        - batch_limit: tamanho máximo dos lotes destes itens (ex.: 1 para o primeiro chunk de
+          um streaming, que não deve esperar os outros ficarem prontos junto com ele).
+        """
+        # os parâmetros (e o limite de lote) fazem parte da chave: só itens iguais vão juntos
+        key = (batch_limit, tuple(sorted(params.items())))
+        futures = []
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BatchScheduler encerrado")
+            for text in texts:
+                fut = Future()
+                self._pending.append((text, key, params, fut))
+                futures.append(fut)
+            # acorda a thread de lotes
+            self._cond.notify()
+
+        return futures
+
+    def close(self):
+        """Encerra a thread de lotes (itens ainda na fila são processados antes)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    # ----------------------------
+    # Laço interno
+    # ----------------------------
+
+    def _collect(self):
+        """Espera o primeiro item e junta companheiros até encher o lote ou estourar max_wait."""
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+
+            if not self._pending:
+                return None  # fechado e sem trabalho
+
+            # a janela de espera conta a partir do momento em que há trabalho na fila
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # pega tudo o que está pendente; o agrupamento por tamanho é feito fora do lock
+            items = list(self._pending)
+            self._pending.clear()
+            return items
+
+    def _loop(self):
+        while True:
+            items = self._collect()
+            if items is None:
+                return
+
+            # separa por parâmetros de geração e ordena por tamanho, para que cada lote
+            # tenha textos de comprimento parecido (menos padding desperdiçado)
+            groups = {}
+            for it in items:
+                groups.setdefault(it[1], []).append(it)
+
+            # grupos com limite de lote existem por latência: rodam antes dos outros
+            for (batch_limit, _), group in sorted(groups.items(), key=lambda kv: kv[0][0] is None):
+                size = min(self.max_batch_size, batch_limit or self.max_batch_size)
+                group.sort(key=lambda it: self.length_fn(it[0]))
+                for start in range(0, len(group), size):
+                    # só marca como "rodando" logo antes do lote: itens de lotes que ainda não
+                    # começaram podem ser cancelados (ex.: cliente desconectou) e são descartados aqui
+                    batch = [it for it in group[start:start + size]
+                             if it[3].set_running_or_notify_cancel()]
+                    if batch:
+                        self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        texts = [it[0] for it in batch]
+        params = batch[0][2]
+
+        try:
+            results = self.batch_fn(texts, **params)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][3].set_exception(e)
+                return
+            # se o lote inteiro falhou, tenta item a item para isolar o(s) chunk(s) problemático(s)
+            for it in batch:
+                self._run_batch([it])
+            return
+
+        for it, result in zip(batch, results):
+            it[3].set_result(result)
+
+        # batch_fn devolveu menos resultados que textos: sem isso os futures restantes
+        # ficariam pendentes para sempre e a requisição travaria esperando por eles
+        if len(results) < len(batch):
+            error = RuntimeError(f"batch_fn devolveu {len(results)} resultados para {len(batch)} textos")
+            for it in batch[len(results):]:
+                it[3].set_exception(error)
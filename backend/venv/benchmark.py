@@ -0,0 +1,308 @@
+# benchmark e avaliação offline do pipeline sobre um corpus JSONL
+#
+# Cada linha do corpus é um documento:
+#   {"id": "doc-1", "html": "<html>...</html>", "referencia": "resumo de referência"}
+# ("texto" também é aceito no lugar de "html"; sem "id", o número da linha é usado)
+#
+# Os documentos passam pelo mesmo caminho de /resumir (setup_pln.run_pipeline:
+# clean_html -> filter_sentences -> preselect_chunks -> summarize_chunks) em processos
+# paralelos. Cada resultado é gravado no arquivo de saída assim que fica pronto, e esse
+# arquivo serve de checkpoint: rodar de novo retoma de onde parou.
+#
+# Relatório final: docs/s, tokens/s (entrada e gerados), percentis de latência por etapa,
+# pico de memória, ROUGE e (opcional) BERTScore.
+#
+# Uso:
+#   python benchmark.py corpus.jsonl --output resultados.jsonl --workers 4
+#   python benchmark.py corpus.jsonl --backend stub --workers 2     # CI, sem baixar o ptt5
+
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+try:
+    # resource só existe em sistemas Unix; no Windows o pico de RSS não é reportado
+    import resource
+except ImportError:
+    resource = None
+
+STAGES = ("clean_html", "filter_sentences", "preselect_chunks", "summarize_chunks", "total")
+
+
+def peak_rss_mb(who="self"):
+    """Pico de RSS (MB) deste processo ("self") ou dos filhos já encerrados ("children")."""
+    if resource is None:
+        return None
+    target = resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN
+    # no Linux ru_maxrss vem em KB
+    return resource.getrusage(target).ru_maxrss / 1024
+
+
+# ----------------------------
+# Funções executadas nos workers
+# ----------------------------
+def _init_worker(backend_name, intra_op_threads):
+    # precisa vir antes do import de setup_pln, que lê a configuração no import
+    if backend_name:
+        os.environ["INFERENCE_BACKEND"] = backend_name
+    os.environ.setdefault("INTRA_OP_THREADS", str(intra_op_threads))
+    os.environ.setdefault("BATCH_MAX_WAIT_MS", "0")
+
+    import setup_pln
+
+    setup_pln.load_model()
+    if not setup_pln.model_ready.is_set():
+        raise RuntimeError(setup_pln.startup_error or "falha ao carregar o modelo")
+
+
+def _ping():
+    # segura o worker por um instante, para os outros pings irem para outros processos
+    time.sleep(0.2)
+    return os.getpid()
+
+
+def _rouge(reference, summary):
+    from rouge_score import rouge_scorer
+
+    from compare_backends import UnicodeTokenizer
+
+    # sem stemmer: o stemmer do rouge_score é para inglês; o tokenizador mantém os acentos
+    scorer = rouge_scorer.RougeScorer(
+        ["rouge1", "rouge2", "rougeL"], use_stemmer=False, tokenizer=UnicodeTokenizer(),
+    )
+    scores = scorer.score(reference, summary)
+    return {key: round(score.fmeasure, 4) for key, score in scores.items()}
+
+
+def process_document(doc_id, html, reference, options):
+    """Roda o pipeline num documento e devolve o registro de resultado (uma linha do JSONL de saída)."""
+    import setup_pln
+
+    timings = {}
+    result = {"id": doc_id, "pid": os.getpid()}
+    start = time.perf_counter()
+    try:
+        sentences, chunks, extrativo, summary = setup_pln.run_pipeline(html, options, timings)
+        timings["total"] = time.perf_counter() - start
+
+        summary = summary or ""
+        result.update({
+            "sentencas": len(sentences),
+            "chunks": len(chunks) if chunks else 0,
+            "extrativo": extrativo,
+            # tokens de entrada = tokens das sentenças filtradas (o que o pipeline de fato considerou)
+            "tokens_entrada": sum(setup_pln.sentence_sizes(sentences)),
+            "tokens_gerados": setup_pln.count_tokens(summary) if summary else 0,
+            "resumo": summary,
+        })
+        if reference and summary:
+            result["rouge"] = _rouge(reference, summary)
+    except Exception as e:
+        timings["total"] = time.perf_counter() - start
+        result["erro"] = str(e)
+
+    result["tempos_s"] = {name: round(value, 4) for name, value in timings.items()}
+    result["rss_mb"] = peak_rss_mb()
+    return result
+
+
+# ----------------------------
+# Corpus e checkpoint
+# ----------------------------
+def read_corpus(path):
+    """Lê o corpus linha a linha (sem carregar o arquivo inteiro na memória)."""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            doc = json.loads(line)
+            doc_id = str(doc.get("id", line_no))
+            yield doc_id, doc.get("html") or doc.get("texto") or "", doc.get("referencia") or ""
+
+
+def read_results(path):
+    """
+    Resultados já gravados com sucesso, um por documento (o último, se houver repetidos).
+    Linhas incompletas de uma execução interrompida e documentos com erro ficam de fora,
+    para serem processados de novo.
+    """
+    results = {}
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            results[result["id"]] = result
+    return [r for r in results.values() if "erro" not in r]
+
+
+# ----------------------------
+# Relatório
+# ----------------------------
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def build_report(results, new_results, elapsed_s, with_bertscore=False):
+    """
+    - results: todos os resultados (checkpoint + execução atual), usados nas métricas de qualidade/latência;
+    - new_results: só os da execução atual, usados na vazão.
+    """
+    ok = [r for r in results if "erro" not in r]
+    report = {
+        "documentos": len(results),
+        "erros": len(results) - len(ok),
+        "processados_nesta_execucao": len(new_results),
+        "tempo_execucao_s": round(elapsed_s, 2),
+    }
+
+    # vazão só da execução atual (documentos retomados do checkpoint não entram)
+    now = [r for r in new_results if "erro" not in r]
+    if elapsed_s > 0 and new_results:
+        report["docs_por_s"] = round(len(new_results) / elapsed_s, 3)
+        report["tokens_entrada_por_s"] = round(sum(r["tokens_entrada"] for r in now) / elapsed_s, 1)
+        report["tokens_gerados_por_s"] = round(sum(r["tokens_gerados"] for r in now) / elapsed_s, 1)
+
+    # percentis de latência por etapa (ms)
+    latency = {}
+    for stage in STAGES:
+        values = [r["tempos_s"][stage] * 1000 for r in ok if stage in r["tempos_s"]]
+        if values:
+            latency[stage] = {
+                "p50": round(percentile(values, 50), 1),
+                "p90": round(percentile(values, 90), 1),
+                "p99": round(percentile(values, 99), 1),
+                "media": round(statistics.fmean(values), 1),
+            }
+    report["latencia_ms"] = latency
+
+    rss = [r["rss_mb"] for r in ok if r.get("rss_mb") is not None]
+    report["pico_rss_worker_mb"] = round(max(rss), 1) if rss else None
+    report["pico_rss_principal_mb"] = round(peak_rss_mb(), 1) if resource is not None else None
+
+    # ROUGE médio
+    scored = [r["rouge"] for r in ok if "rouge" in r]
+    if scored:
+        report["rouge"] = {
+            key: round(statistics.fmean(s[key] for s in scored), 4) for key in ("rouge1", "rouge2", "rougeL")
+        }
+
+    if with_bertscore:
+        report["bertscore_f1"] = bertscore(ok)
+
+    return report
+
+
+def bertscore(results):
+    """BERTScore F1 médio (modelo multilíngue, idioma pt) entre resumos e referências."""
+    from bert_score import score
+
+    pairs = [(r["resumo"], r["referencia"]) for r in results if r.get("referencia") and r.get("resumo")]
+    if not pairs:
+        return None
+    candidates, references = zip(*pairs)
+    _, _, f1 = score(list(candidates), list(references), lang="pt", verbose=False)
+    return round(float(f1.mean()), 4)
+
+
+# ----------------------------
+# Execução
+# ----------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark/avaliação offline do pipeline de resumo.")
+    parser.add_argument("corpus", help="arquivo JSONL com os documentos")
+    parser.add_argument("--output", default="resultados.jsonl", help="resultados por documento (e checkpoint)")
+    parser.add_argument("--report", default=None, help="salva o relatório final em JSON")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backend", default=None, help="fp32, int8, onnx ou stub (padrão: INFERENCE_BACKEND)")
+    parser.add_argument("--max-docs", type=int, default=None)
+    parser.add_argument("--max-sentencas", type=int, default=None)
+    parser.add_argument("--orcamento-tokens", type=int, default=None)
+    parser.add_argument("--metodo-extrativo", default=None)
+    parser.add_argument("--bertscore", action="store_true", help="calcula BERTScore (baixa um modelo)")
+    args = parser.parse_args()
+
+    options = {"top_k": args.max_sentencas, "budget": args.orcamento_tokens}
+    if args.metodo_extrativo:
+        options["method"] = args.metodo_extrativo
+
+    # checkpoint: documentos que já têm resultado são pulados
+    previous = read_results(args.output)
+    done = {r["id"] for r in previous}
+    if done:
+        print(f"Retomando: {len(done)} documentos já processados.")
+
+    # spawn: cada worker começa limpo e carrega o modelo uma vez no inicializador
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(args.backend, max(1, (os.cpu_count() or 1) // args.workers)),
+    )
+
+    # sobe os workers (e carrega o modelo) antes de começar a medir a vazão
+    print("Carregando workers...")
+    wait([executor.submit(_ping) for _ in range(args.workers)])
+
+    new_results = []
+    start = time.perf_counter()
+    # no máximo 2 documentos por worker em memória ao mesmo tempo
+    max_pending = 2 * args.workers
+    pending = {}
+
+    with executor, open(args.output, "a", encoding="utf-8") as out:
+
+        def collect(futures):
+            for fut in futures:
+                reference = pending.pop(fut)
+                result = fut.result()
+                result["referencia"] = reference
+                # gravação incremental: uma linha por documento, já no disco
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                new_results.append(result)
+                if len(new_results) % 10 == 0:
+                    print(f"{len(new_results)} documentos processados...")
+
+        submitted = 0
+        for doc_id, html, reference in read_corpus(args.corpus):
+            if args.max_docs is not None and submitted >= args.max_docs:
+                break
+            if doc_id in done:
+                continue
+            submitted += 1
+
+            if len(pending) >= max_pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+
+            pending[executor.submit(process_document, doc_id, html, reference, options)] = reference
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(finished)
+
+    elapsed = time.perf_counter() - start
+    report = build_report(previous + new_results, new_results, elapsed, with_bertscore=args.bertscore)
+    report["pico_rss_workers_encerrados_mb"] = round(peak_rss_mb("children"), 1) if resource is not None else None
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# cache de resumos por chunk, endereçado por conteúdo
+#
+# A chave é um hash SHA-256 do texto normalizado do chunk + nome do modelo + parâmetros
+# de geração. Assim, páginas que compartilham trechos com requisições anteriores só
+# pagam geração pelos chunks novos.
+#
+# Duas camadas:
+# - memória: LRU limitada por bytes (OrderedDict)
+# - disco (opcional): SQLite, sobrevive a reinícios do servidor; limitado por número de
+#   linhas (as mais antigas saem primeiro). Falhas do disco (ex.: "database is locked" com
+#   vários workers no mesmo arquivo) não derrubam a requisição: viram miss / escrita perdida.
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+# normalização: espaços colapsados e removidos nas pontas (o conteúdo em si não muda)
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_chunk(text):
+    """Normaliza o texto do chunk para que variações de espaçamento gerem a mesma chave."""
+    return _WS_RE.sub(" ", text).strip()
+
+
+def make_key(text, model_name, **params):
+    """Gera a chave do cache a partir do texto normalizado, do modelo e dos parâmetros de geração."""
+    payload = json.dumps(
+        {"text": normalize_chunk(text), "model": model_name, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ChunkCache:
+    """
+    Cache LRU limitado por bytes, com persistência opcional em SQLite.
+    - max_bytes: limite de memória (tamanho aproximado das strings de resumo em UTF-8).
+    - db_path: caminho do arquivo SQLite; None desativa a persistência.
+    - max_rows: limite de linhas no SQLite (FIFO por ordem de gravação); None = sem limite.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, db_path=None, max_rows=None):
+        self.max_bytes = int(max_bytes)
+        self.max_rows = int(max_rows) if max_rows else None
+        self._entries = OrderedDict()  # chave -> resumo (ordem = recência de uso)
+        self._bytes = 0
+        # _lock protege só a memória; o SQLite tem o próprio lock, para que uma escrita
+        # lenta no disco não bloqueie as consultas das outras requisições
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+
+        # contadores expostos em stats()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.disk_errors = 0
+
+        self._db = None
+        if db_path:
+            # check_same_thread=False: o acesso é serializado por _db_lock
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS resumos (chave TEXT PRIMARY KEY, resumo TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _size(key, value):
+        return len(key) + len(value.encode("utf-8"))
+
+    def get(self, key):
+        """Retorna o resumo em cache ou None. Entradas achadas no disco sobem para a memória."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if self._db is None:
+                self.misses += 1
+                return None
+
+        # leitura do disco fora do lock da memória
+        try:
+            with self._db_lock:
+                row = self._db.execute("SELECT resumo FROM resumos WHERE chave = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            # o cache é só um atalho: sem o disco, o chunk é gerado de novo
+            print("Falha ao ler o cache em disco:", e)
+            row = None
+            with self._lock:
+                self.disk_errors += 1
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._put_memory(key, row[0])
+            return row[0]
+
+    def put(self, key, value):
+        """Grava o resumo na memória e, se configurado, no disco."""
+        with self._lock:
+            self._put_memory(key, value)
+
+        if self._db is not None:
+            # escrita no disco fora do lock da memória: get() de outras requisições não espera o commit
+            try:
+                with self._db_lock:
+                    self._write_db(key, value)
+            except sqlite3.Error as e:
+                # o resumo já está na memória; só a persistência desta entrada se perde
+                print("Falha ao gravar o cache em disco:", e)
+                with self._lock:
+                    self.disk_errors += 1
+
+    def _write_db(self, key, value):
+        try:
+            # INSERT OR REPLACE apaga a linha antiga e cria outra: o rowid marca a última gravação
+            self._db.execute(
+                "INSERT OR REPLACE INTO resumos (chave, resumo) VALUES (?, ?)", (key, value)
+            )
+            if self.max_rows is not None:
+                # apaga as linhas gravadas há mais tempo; com buracos nos rowids podem sobrar
+                # menos que max_rows linhas, nunca mais
+                self._db.execute(
+                    "DELETE FROM resumos WHERE rowid <= (SELECT MAX(rowid) FROM resumos) - ?",
+                    (self.max_rows,),
+                )
+            self._db.commit()
+        except sqlite3.Error:
+            self._db.rollback()
+            raise
+
+    def _put_memory(self, key, value):
+        size = self._size(key, value)
+        if size > self.max_bytes:
+            return  # entrada maior que o cache inteiro: não vale a pena guardar na memória
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= self._size(key, old)
+
+        self._entries[key] = value
+        self._bytes += size
+
+        # remove as entradas menos usadas até caber no limite
+        while self._bytes > self.max_bytes:
+            old_key, old_value = self._entries.popitem(last=False)
+            self._bytes -= self._size(old_key, old_value)
+            self.evictions += 1
+
+    def stats(self):
+        """Contadores de uso do cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_hits": self.disk_hits,
+                "disk_errors": self.disk_errors,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "persistent": self._db is not None,
+            }
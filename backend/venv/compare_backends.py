@@ -0,0 +1,236 @@
+# compara os backends de inferência (fp32 / int8 / onnx) num conjunto fixo de textos em português
+#
+# Para cada backend, mede:
+# - latência por chunk (p50/p95, lote de 1)
+# - vazão em lote (chunks/s)
+# - pico de memória residente (RSS) do processo
+# - desvio de qualidade: ROUGE-1/2/L dos resumos do backend contra os resumos do fp32
+#
+# Cada backend roda num processo separado, para que o pico de RSS de um não contamine o outro.
+#
+# Uso:
+#   python compare_backends.py                       # todos os backends
+#   python compare_backends.py --backends fp32 int8 --threads 4 --json resultado.json
+
+import argparse
+import json
+import multiprocessing
+import re
+import statistics
+import time
+from queue import Empty
+
+from inference_backends import BACKENDS, MODEL_NAME, create_backend
+
+try:
+    # resource só existe em sistemas Unix; no Windows o pico de RSS não é reportado
+    import resource
+except ImportError:
+    resource = None
+
+
+# conjunto fixo de amostras (cada uma do tamanho aproximado de um chunk do /resumir)
+SAMPLES = [
+    "O Banco Central anunciou nesta quarta-feira a manutenção da taxa básica de juros, "
+    "citando incertezas no cenário externo e a desaceleração gradual da inflação. Segundo o comunicado, "
+    "o comitê avalia que o processo de desinflação segue em curso, mas exige cautela diante da volatilidade "
+    "dos preços de alimentos e combustíveis. Economistas consultados avaliam que cortes podem ocorrer "
+    "no segundo semestre, caso as expectativas de inflação voltem a convergir para a meta.",
+
+    "Pesquisadores de uma universidade federal desenvolveram um sensor de baixo custo capaz de detectar "
+    "contaminação por metais pesados em rios. O dispositivo utiliza nanopartículas que mudam de cor "
+    "na presença de chumbo e mercúrio, permitindo análises em campo sem a necessidade de laboratórios. "
+    "A equipe pretende distribuir os sensores para comunidades ribeirinhas da Amazônia, onde o garimpo "
+    "ilegal tem comprometido a qualidade da água e a saúde da população.",
+
+    "A prefeitura apresentou um plano de mobilidade urbana que prevê a ampliação de ciclovias, "
+    "a criação de corredores exclusivos de ônibus e a renovação da frota com veículos elétricos. "
+    "O projeto deve ser executado ao longo de oito anos e será financiado com recursos municipais "
+    "e empréstimos de bancos de desenvolvimento. Moradores das regiões periféricas cobram que as obras "
+    "comecem pelos bairros com maior tempo de deslocamento até o centro.",
+
+    "O campeonato nacional de futebol chegou à reta final com três equipes disputando o título. "
+    "O líder venceu o clássico do fim de semana por dois a zero e abriu quatro pontos de vantagem, "
+    "mas ainda enfrenta adversários diretos nas próximas rodadas. O técnico destacou a evolução "
+    "defensiva do time e pediu concentração aos jogadores, lembrando que a competição já teve "
+    "reviravoltas inesperadas em temporadas anteriores.",
+
+    "Um estudo publicado em revista internacional mostrou que a prática regular de atividade física "
+    "reduz em até trinta por cento o risco de doenças cardiovasculares em adultos acima de cinquenta anos. "
+    "Os pesquisadores acompanharam mais de dez mil voluntários durante uma década e observaram benefícios "
+    "mesmo entre participantes que começaram a se exercitar tardiamente. Os autores recomendam ao menos "
+    "cento e cinquenta minutos semanais de exercícios moderados.",
+
+    "A safra de grãos deve bater novo recorde neste ano, impulsionada pelo aumento da produtividade "
+    "da soja e do milho no Centro-Oeste. A estimativa da companhia de abastecimento aponta crescimento "
+    "de seis por cento em relação ao ciclo anterior, apesar das perdas provocadas pela estiagem no Sul. "
+    "O resultado deve reforçar as exportações do agronegócio, mas especialistas alertam para gargalos "
+    "logísticos nas rodovias e nos portos durante o pico do escoamento.",
+]
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo atual, em MB (None se indisponível)."""
+    if resource is None:
+        return None
+    # no Linux ru_maxrss vem em KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(name, args, queue):
+    """Executa o benchmark de um backend (no processo filho) e envia o resultado pela fila."""
+    try:
+        load_start = time.perf_counter()
+        backend = create_backend(
+            name,
+            MODEL_NAME,
+            intra_op_threads=args.threads,
+            inter_op_threads=args.interop_threads,
+            onnx_export_dir=args.onnx_export_dir,
+        )
+        load_s = time.perf_counter() - load_start
+
+        params = {"max_length": args.max_length, "min_length": args.min_length, "do_sample": False}
+
+        # aquecimento: não entra nas medições
+        backend.generate(SAMPLES[:1], **params)
+
+        # latência: um chunk por vez
+        latencies = []
+        outputs = []
+        for _ in range(args.repeats):
+            outputs = []
+            for sample in SAMPLES:
+                start = time.perf_counter()
+                outputs.extend(backend.generate([sample], **params))
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        # vazão: todos os chunks em lotes de batch_size
+        start = time.perf_counter()
+        total = 0
+        for _ in range(args.repeats):
+            for i in range(0, len(SAMPLES), args.batch_size):
+                batch = SAMPLES[i:i + args.batch_size]
+                backend.generate(batch, **params)
+                total += len(batch)
+        throughput = total / (time.perf_counter() - start)
+
+        latencies.sort()
+        queue.put({
+            "backend": name,
+            "load_s": round(load_s, 2),
+            "latency_p50_ms": round(statistics.median(latencies), 1),
+            "latency_p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 1),
+            "throughput_chunks_s": round(throughput, 2),
+            "peak_rss_mb": round(peak_rss_mb(), 1) if resource is not None else None,
+            "outputs": outputs,
+        })
+    except Exception as e:
+        queue.put({"backend": name, "error": str(e)})
+
+
+def wait_result(name, proc, queue, poll_s=1.0):
+    """
+    Espera o resultado do processo filho. Se ele morrer sem mandar nada (OOM killer, segfault
+    no runtime nativo), o erro vira o resultado do backend em vez de travar o script para sempre.
+    """
+    while True:
+        try:
+            return queue.get(timeout=poll_s)
+        except Empty:
+            if proc.is_alive():
+                continue
+        # o filho terminou: o resultado pode ter chegado no intervalo entre o get e o is_alive
+        try:
+            return queue.get(timeout=poll_s)
+        except Empty:
+            return {"backend": name, "error": f"processo terminou sem resultado (exitcode {proc.exitcode})"}
+
+
+class UnicodeTokenizer:
+    """
+    Tokenizador para o rouge_score que mantém letras acentuadas.
+    O padrão do rouge_score troca tudo que não é [a-z0-9] por espaço, então
+    "ação" virava "a" + "o" e as métricas em português ficavam distorcidas.
+    """
+
+    _TOKEN_RE = re.compile(r"\w+")
+
+    def tokenize(self, text):
+        return self._TOKEN_RE.findall(text.lower())
+
+
+def rouge_drift(reference_outputs, outputs):
+    """ROUGE-1/2/L F1 médio dos resumos de um backend contra os resumos do fp32."""
+    from rouge_score import rouge_scorer
+
+    # sem stemmer: o stemmer do rouge_score é para inglês
+    scorer = rouge_scorer.RougeScorer(
+        ["rouge1", "rouge2", "rougeL"], use_stemmer=False, tokenizer=UnicodeTokenizer(),
+    )
+    totals = {"rouge1": 0.0, "rouge2": 0.0, "rougeL": 0.0}
+    for ref, out in zip(reference_outputs, outputs):
+        scores = scorer.score(ref, out)
+        for key in totals:
+            totals[key] += scores[key].fmeasure
+    return {key: round(value / len(outputs), 4) for key, value in totals.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara backends de inferência do ptt5-base-summ.")
+    parser.add_argument(
+        "--backends", nargs="+", choices=BACKENDS,
+        default=[name for name in BACKENDS if name != "stub"],
+    )
+    parser.add_argument("--threads", type=int, default=None, help="threads intra-op")
+    parser.add_argument("--interop-threads", type=int, default=None, help="threads inter-op")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--max-length", type=int, default=200)
+    parser.add_argument("--min-length", type=int, default=80)
+    parser.add_argument("--onnx-export-dir", default=None)
+    parser.add_argument("--json", default=None, help="salva os resultados neste arquivo")
+    args = parser.parse_args()
+
+    # spawn: cada backend começa num processo limpo (RSS e threads independentes)
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for name in args.backends:
+        print(f"Rodando backend {name}...")
+        queue = ctx.Queue()
+        proc = ctx.Process(target=run_backend, args=(name, args, queue))
+        proc.start()
+        result = wait_result(name, proc, queue)
+        proc.join()
+        results.append(result)
+
+    # o fp32 é a referência de qualidade
+    reference = next((r for r in results if r["backend"] == "fp32" and "error" not in r), None)
+    for r in results:
+        if "error" in r:
+            continue
+        if reference is not None:
+            r["rouge_vs_fp32"] = rouge_drift(reference["outputs"], r["outputs"])
+
+    # tabela resumida no console
+    header = f"{'backend':<8} {'load_s':>7} {'p50_ms':>8} {'p95_ms':>8} {'chunks/s':>9} {'rss_mb':>8} {'rougeL':>7}"
+    print()
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        if "error" in r:
+            print(f"{r['backend']:<8} ERRO: {r['error']}")
+            continue
+        rouge_l = r.get("rouge_vs_fp32", {}).get("rougeL")
+        print(
+            f"{r['backend']:<8} {r['load_s']:>7} {r['latency_p50_ms']:>8} {r['latency_p95_ms']:>8} "
+            f"{r['throughput_chunks_s']:>9} {str(r['peak_rss_mb']):>8} {str(rouge_l):>7}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
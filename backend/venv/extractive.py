@@ -0,0 +1,151 @@
+# etapa extrativa: escolhe as sentenças mais centrais antes da sumarização abstrativa
+#
+# A centralidade é calculada com TextRank (PageRank sobre o grafo de similaridade entre
+# sentenças), de forma vetorizada:
+# - "tfidf": similaridade de cosseno entre vetores TF-IDF (scikit-learn)
+# - "embeddings": similaridade de cosseno entre embeddings do sentence-transformers
+# Páginas muito longas passam antes por um corte linear (proximidade ao centróide), para
+# que o grafo tenha no máximo MAX_RANKED sentenças e o custo continue limitado.
+#
+# As sentenças escolhidas voltam na ordem original do texto, para o resumo abstrativo
+# continuar coerente. Com isso o número de chunks (chamadas de geração) por requisição
+# fica limitado pelo orçamento, não pelo tamanho da página.
+
+import os
+from functools import lru_cache
+
+import numpy as np
+
+METHODS = ("tfidf", "embeddings")
+
+# modelo multilíngue (inclui português) usado pelo método "embeddings"
+EMBEDDING_MODEL = os.environ.get(
+    "EXTRACTIVE_EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+)
+
+# máximo de sentenças no grafo do TextRank: a matriz de similaridade é n x n, e uma página
+# de 2 milhões de caracteres (~15 mil sentenças) pediria ~1,8 GB por matriz
+MAX_RANKED = int(os.environ.get("EXTRACTIVE_MAX_RANKED", "1000"))
+
+
+@lru_cache(maxsize=1)
+def _embedder():
+    # importado e carregado só na primeira vez que o método "embeddings" é usado
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+
+
+def sentence_vectors(sentences, method="tfidf", stop_words=None):
+    """
+    Vetores normalizados (norma L2) das sentenças: esparsos no "tfidf", densos no "embeddings".
+    Retorna None se o TF-IDF não tiver vocabulário (só stopwords/números).
+    """
+    if method == "tfidf":
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        # TfidfVectorizer já normaliza as linhas (norma L2), então X @ X.T é o cosseno
+        try:
+            return TfidfVectorizer(lowercase=True, stop_words=stop_words).fit_transform(sentences)
+        except ValueError:
+            return None
+    if method == "embeddings":
+        return _embedder().encode(sentences, normalize_embeddings=True, convert_to_numpy=True)
+    raise ValueError(f"Método extrativo desconhecido: {method!r} (opções: {', '.join(METHODS)})")
+
+
+def similarity_matrix(vectors):
+    """Matriz densa (n x n) de similaridade de cosseno entre os vetores, com diagonal zerada."""
+    sim = vectors @ vectors.T
+    if hasattr(sim, "toarray"):
+        sim = sim.toarray()
+    # similaridades negativas (embeddings) não fazem sentido como peso de aresta
+    np.clip(sim, 0.0, None, out=sim)
+    np.fill_diagonal(sim, 0.0)
+    return sim
+
+
+def textrank(sim, damping=0.85, max_iter=100, tol=1e-6):
+    """
+    PageRank por iteração de potência sobre a matriz de similaridade.
+    A matriz é normalizada no lugar (vira a matriz de transição), sem cópia n x n.
+    """
+    n = sim.shape[0]
+    row_sums = sim.sum(axis=1)
+
+    # normaliza as linhas (matriz de transição); sentenças isoladas distribuem peso uniforme
+    connected = row_sums > 0
+    sim[connected] /= row_sums[connected, None]
+    sim[~connected] = 1.0 / n
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        new_scores = (1 - damping) / n + damping * (sim.T @ scores)
+        if np.abs(new_scores - scores).sum() < tol:
+            return new_scores
+        scores = new_scores
+    return scores
+
+
+def central_candidates(vectors, limit):
+    """Índices (em ordem crescente) das `limit` sentenças mais próximas do centróide do texto."""
+    centroid = np.asarray(vectors.mean(axis=0)).ravel()
+    closeness = np.asarray(vectors @ centroid).ravel()
+    return np.sort(np.argsort(-closeness, kind="stable")[:limit])
+
+
+def sentence_scores(sentences, method="tfidf", stop_words=None, max_ranked=None):
+    """
+    Escore de centralidade de cada sentença (maior = mais central).
+    O grafo do TextRank é denso (n x n): acima de max_ranked sentenças, só as max_ranked mais
+    próximas do centróide entram no grafo (custo linear), e as outras ficam com escore -1.
+    """
+    n = len(sentences)
+    max_ranked = MAX_RANKED if max_ranked is None else max_ranked
+
+    vectors = sentence_vectors(sentences, method=method, stop_words=stop_words)
+    if vectors is None:
+        # sem vocabulário não há arestas: escores iguais, o ranking vira a ordem original
+        return np.full(n, 1.0 / n)
+
+    if n <= max_ranked:
+        return textrank(similarity_matrix(vectors))
+
+    candidates = central_candidates(vectors, max_ranked)
+    scores = np.full(n, -1.0)
+    scores[candidates] = textrank(similarity_matrix(vectors[candidates]))
+    return scores
+
+
+def select_sentences(sentences, sizes, top_k=None, budget=None, method="tfidf", stop_words=None):
+    """
+    Retorna (índices das sentenças mantidas em ordem crescente, escores de centralidade).
+    - sizes: tamanho de cada sentença (tokens ou palavras), usado pelo budget.
+    - top_k: número máximo de sentenças mantidas.
+    - budget: soma máxima de sizes das sentenças mantidas.
+    Se tudo já cabe, nenhuma sentença é descartada (e o ranking nem é calculado: escores None).
+    """
+    n = len(sentences)
+    fits_k = top_k is None or n <= top_k
+    fits_budget = budget is None or sum(sizes) <= budget
+    if fits_k and fits_budget:
+        return list(range(n)), None
+
+    scores = sentence_scores(sentences, method=method, stop_words=stop_words)
+
+    # percorre do maior para o menor escore; sentenças que não cabem no que resta do
+    # orçamento são puladas (uma menor, mais adiante, ainda pode caber)
+    kept = []
+    used = 0
+    for i in np.argsort(-scores, kind="stable"):
+        if top_k is not None and len(kept) >= top_k:
+            break
+        if budget is not None and used + sizes[i] > budget:
+            continue
+        kept.append(int(i))
+        used += sizes[i]
+
+    # nenhuma sentença coube sozinha no orçamento: mantém a mais central (o modelo a trunca)
+    if not kept:
+        kept = [int(np.argmax(scores))]
+
+    return sorted(kept), scores
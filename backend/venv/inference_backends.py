@@ -0,0 +1,191 @@
+# backends de inferência para o modelo de sumarização (selecionáveis por configuração)
+#
+# Todos expõem a mesma interface, então summarize_chunks não muda com o backend:
+#   backend.tokenizer                                   -> tokenizador do modelo
+#   backend.generate(textos, max_length, min_length, do_sample) -> lista de resumos
+#
+# Backends disponíveis:
+# - "fp32": pipeline("summarization") padrão do PyTorch (comportamento original)
+# - "int8": mesmo AutoModelForSeq2SeqLM com quantização dinâmica int8 das camadas Linear (CPU)
+# - "onnx": encoder/decoder exportados para ONNX com KV-cache, executados no ONNX Runtime
+#           (requer o pacote opcional optimum[onnxruntime], em requirements-onnx.txt)
+# - "stub": modelo falso, sem download (CI e testes do pipeline)
+#
+# torch/transformers/optimum são importados só dentro das funções, para que importar
+# este módulo continue barato (ver carregamento em segundo plano em setup_pln.py).
+
+import os
+
+BACKENDS = ("fp32", "int8", "onnx", "stub")
+
+# nome do modelo Hugging Face que será carregado (fine-tuned para sumarização em pt); fica aqui,
+# e não em setup_pln, para compare_backends.py não precisar importar Flask/NLTK só por ele
+MODEL_NAME = "recogna-nlp/ptt5-base-summ"
+
+
+def _no_timer(name, fn):
+    return fn()
+
+
+def configure_torch_threads(intra_op_threads=None, inter_op_threads=None):
+    """Define o número de threads do PyTorch (intra-op = dentro de um operador, inter-op = entre operadores)."""
+    import torch
+
+    if intra_op_threads:
+        torch.set_num_threads(int(intra_op_threads))
+    if inter_op_threads:
+        try:
+            # só pode ser chamado antes de qualquer trabalho paralelo no processo
+            torch.set_num_interop_threads(int(inter_op_threads))
+        except RuntimeError as e:
+            print("Não foi possível ajustar inter-op threads:", e)
+
+
+class PipelineBackend:
+    """
+    Backend PyTorch baseado no pipeline de summarization.
+    - quantize=True aplica quantização dinâmica int8 (só CPU) antes de montar o pipeline.
+    """
+
+    def __init__(self, model_name, quantize=False, local_files_only=False,
+                 intra_op_threads=None, inter_op_threads=None, timer=_no_timer):
+        def import_libs():
+            import torch
+            from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
+            return torch, AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
+
+        torch, AutoTokenizer, AutoModelForSeq2SeqLM, pipeline = timer("import_torch", import_libs)
+        configure_torch_threads(intra_op_threads, inter_op_threads)
+
+        # a quantização dinâmica do PyTorch só roda em CPU
+        self.device = 0 if torch.cuda.is_available() and not quantize else -1
+        print("Device:", "GPU" if self.device == 0 else "CPU")
+
+        self.tokenizer = timer(
+            "tokenizer",
+            lambda: AutoTokenizer.from_pretrained(model_name, local_files_only=local_files_only),
+        )
+        model = timer(
+            "model",
+            lambda: AutoModelForSeq2SeqLM.from_pretrained(model_name, local_files_only=local_files_only),
+        )
+
+        if quantize:
+            # troca os pesos das camadas Linear por int8; as ativações são quantizadas em tempo de execução
+            model = timer(
+                "quantize",
+                lambda: torch.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8),
+            )
+
+        self.model = model
+        self.pipe = timer(
+            "pipeline",
+            lambda: pipeline("summarization", model=model, tokenizer=self.tokenizer, device=self.device),
+        )
+
+    def generate(self, texts, max_length=200, min_length=80, do_sample=False):
+        outputs = self.pipe(
+            texts,
+            max_length=max_length,
+            min_length=min_length,
+            do_sample=do_sample,
+            batch_size=len(texts),
+        )
+        return [out["summary_text"] for out in outputs]
+
+
+class OnnxBackend:
+    """
+    Backend ONNX Runtime (CPU) com encoder/decoder exportados e KV-cache no decoder.
+    - export_dir: pasta onde o modelo exportado é salvo/reaproveitado (evita reexportar a cada start).
+    """
+
+    def __init__(self, model_name, local_files_only=False, export_dir=None,
+                 intra_op_threads=None, inter_op_threads=None, timer=_no_timer):
+        def import_libs():
+            import onnxruntime as ort
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+            from transformers import AutoTokenizer
+            return ort, ORTModelForSeq2SeqLM, AutoTokenizer
+
+        try:
+            ort, ORTModelForSeq2SeqLM, AutoTokenizer = timer("import_onnxruntime", import_libs)
+        except ImportError as e:
+            raise RuntimeError(
+                "Backend 'onnx' requer o pacote opcional optimum[onnxruntime]: pip install -r requirements-onnx.txt"
+            ) from e
+
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = int(intra_op_threads)
+        if inter_op_threads:
+            options.inter_op_num_threads = int(inter_op_threads)
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.device = -1
+        print("Device: CPU (ONNX Runtime)")
+
+        self.tokenizer = timer(
+            "tokenizer",
+            lambda: AutoTokenizer.from_pretrained(model_name, local_files_only=local_files_only),
+        )
+
+        def load():
+            # reaproveita a exportação anterior, se existir; senão exporta e salva
+            if export_dir and os.path.isdir(export_dir):
+                return ORTModelForSeq2SeqLM.from_pretrained(
+                    export_dir, use_cache=True, session_options=options, provider="CPUExecutionProvider",
+                )
+            model = ORTModelForSeq2SeqLM.from_pretrained(
+                model_name, export=True, use_cache=True, session_options=options,
+                provider="CPUExecutionProvider", local_files_only=local_files_only,
+            )
+            if export_dir:
+                model.save_pretrained(export_dir)
+            return model
+
+        self.model = timer("model", load)
+
+    def generate(self, texts, max_length=200, min_length=80, do_sample=False):
+        # entradas maiores que a janela do modelo são cortadas (mantém o custo por chunk limitado)
+        inputs = self.tokenizer(texts, padding=True, truncation=True, return_tensors="pt")
+        output_ids = self.model.generate(
+            **inputs, max_length=max_length, min_length=min_length, do_sample=do_sample,
+        )
+        return self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+
+
+class StubBackend:
+    """
+    Backend falso para CI: não carrega modelo nenhum e "resume" devolvendo as primeiras
+    max_length palavras do texto. Sem tokenizador, o chunking volta a ser por palavras.
+    """
+
+    def __init__(self, timer=_no_timer):
+        self.tokenizer = None
+        self.device = -1
+        print("Device: nenhum (backend stub)")
+
+    def generate(self, texts, max_length=200, min_length=80, do_sample=False):
+        return [" ".join(text.split()[:max_length]) for text in texts]
+
+
+def create_backend(name, model_name, local_files_only=False, intra_op_threads=None,
+                   inter_op_threads=None, onnx_export_dir=None, timer=_no_timer):
+    """
+    Cria o backend pelo nome ("fp32", "int8", "onnx" ou "stub").
+    - timer(nome, fn): chamado em cada fase do carregamento (usado para medir o startup).
+    """
+    threads = {"intra_op_threads": intra_op_threads, "inter_op_threads": inter_op_threads}
+
+    if name == "fp32":
+        return PipelineBackend(model_name, local_files_only=local_files_only, timer=timer, **threads)
+    if name == "int8":
+        return PipelineBackend(model_name, quantize=True, local_files_only=local_files_only, timer=timer, **threads)
+    if name == "onnx":
+        return OnnxBackend(model_name, local_files_only=local_files_only, export_dir=onnx_export_dir,
+                           timer=timer, **threads)
+    if name == "stub":
+        return StubBackend(timer=timer)
+
+    raise ValueError(f"Backend desconhecido: {name!r} (opções: {', '.join(BACKENDS)})")
@@ -0,0 +1,117 @@
+# métricas de execução do pipeline, expostas em /metrics no formato texto do Prometheus
+#
+# - histogramas: duração de cada etapa, chunks por requisição, tokens gerados por segundo
+# - contadores: tokens gerados, requisições com erro, chunks que caíram no fallback
+#
+# O registro é thread-safe. drain()/merge() permitem juntar métricas de outros
+# processos (ex.: workers do servidor ASGI) num registro central.
+
+import threading
+
+# limites dos buckets dos histogramas
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+CHUNK_BUCKETS = (1, 2, 3, 4, 5, 8, 12, 16, 32)
+TOKENS_PER_SECOND_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# nome -> (tipo, descrição, buckets)
+DEFINITIONS = {
+    "resumo_stage_seconds": ("histogram", "Duração de cada etapa do pipeline (segundos)", STAGE_BUCKETS),
+    "resumo_chunks_per_request": ("histogram", "Chunks enviados ao modelo por requisição", CHUNK_BUCKETS),
+    "resumo_generation_tokens_per_second": (
+        "histogram", "Tokens gerados por segundo em cada lote", TOKENS_PER_SECOND_BUCKETS,
+    ),
+    "resumo_generated_tokens_total": ("counter", "Tokens gerados pelo modelo", None),
+    "resumo_requests_total": ("counter", "Requisições por status HTTP", None),
+    "resumo_errors_total": ("counter", "Requisições que terminaram em erro", None),
+    "resumo_chunk_fallbacks_total": ("counter", "Chunks devolvidos sem resumo (fallback)", None),
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=None):
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Metrics:
+    """Registro de histogramas e contadores, indexados por (nome, rótulos)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (nome, rótulos) -> [contagens por bucket, soma, total]
+        self._counters = {}    # (nome, rótulos) -> valor
+
+    def observe(self, name, value, **labels):
+        """Registra um valor num histograma."""
+        buckets = DEFINITIONS[name][2]
+        key = (name, _labels_key(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for i, limit in enumerate(buckets):
+                if value <= limit:
+                    hist[0][i] += 1
+            hist[1] += value
+            hist[2] += 1
+
+    def inc(self, name, value=1, **labels):
+        """Soma value a um contador."""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def drain(self):
+        """Devolve tudo o que foi registrado até agora e zera o registro."""
+        with self._lock:
+            snapshot = {"histograms": self._histograms, "counters": self._counters}
+            self._histograms = {}
+            self._counters = {}
+        return snapshot
+
+    def merge(self, snapshot):
+        """Soma um snapshot de drain() (de outro processo) a este registro."""
+        with self._lock:
+            for key, (counts, total, n) in snapshot["histograms"].items():
+                hist = self._histograms.get(key)
+                if hist is None:
+                    self._histograms[key] = [list(counts), total, n]
+                else:
+                    hist[0] = [a + b for a, b in zip(hist[0], counts)]
+                    hist[1] += total
+                    hist[2] += n
+            for key, value in snapshot["counters"].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus."""
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, buckets) in DEFINITIONS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+                if kind == "histogram":
+                    for (hname, key), (counts, total, n) in sorted(self._histograms.items()):
+                        if hname != name:
+                            continue
+                        for limit, count in zip(buckets, counts):
+                            lines.append(f"{name}_bucket{_format_labels(key, ('le', limit))} {count}")
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {n}")
+                        lines.append(f"{name}_sum{_format_labels(key)} {total}")
+                        lines.append(f"{name}_count{_format_labels(key)} {n}")
+                else:
+                    for (cname, key), value in sorted(self._counters.items()):
+                        if cname == name:
+                            lines.append(f"{name}{_format_labels(key)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+# registro padrão do processo
+registry = Metrics()
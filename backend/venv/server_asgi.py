@@ -0,0 +1,486 @@
+# modo de produção: front-end ASGI (FastAPI + uvicorn) com inferência em processos separados
+#
+# - mesmo contrato de POST /resumir, POST /resumir/stream e GET /cache/stats do app Flask (setup_pln.py)
+# - pool de ASGI_WORKERS processos; cada processo carrega o modelo uma única vez
+# - fila limitada: quando todos os processos estão ocupados e a fila está cheia,
+#   responde 429 com Retry-After (e 503 enquanto os processos ainda carregam o modelo)
+# - timeout por requisição: trabalho que ainda está na fila é cancelado
+# - limite de tamanho da entrada (413)
+#
+# Uso:
+#   python server_asgi.py
+#   ASGI_WORKERS=4 ASGI_QUEUE_SIZE=16 REQUEST_TIMEOUT_S=60 python server_asgi.py
+#
+# O processo principal não importa setup_pln (nem torch): só recebe as requisições e
+# distribui o trabalho. O pipeline roda em setup_pln.generate_summary (ou
+# setup_pln.iter_stream_messages, no streaming), nos workers; as mensagens do streaming
+# voltam para o processo principal por uma fila do multiprocessing.Manager.
+
+import asyncio
+import functools
+import json
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+# registro de métricas do processo principal (recebe também as métricas dos workers)
+from metrics import registry as metrics
+
+
+# ----------------------------
+# Configuração
+# ----------------------------
+# número de processos de inferência
+ASGI_WORKERS = int(os.environ.get("ASGI_WORKERS", str(os.cpu_count() or 1)))
+# requisições que podem esperar na fila além das que estão rodando
+ASGI_QUEUE_SIZE = int(os.environ.get("ASGI_QUEUE_SIZE", str(2 * ASGI_WORKERS)))
+# tempo máximo (fila + processamento) de cada requisição
+REQUEST_TIMEOUT_S = float(os.environ.get("REQUEST_TIMEOUT_S", "60"))
+# limite do corpo da requisição e do campo 'html'
+MAX_BODY_BYTES = int(os.environ.get("MAX_BODY_BYTES", str(5 * 1024 * 1024)))
+MAX_HTML_CHARS = int(os.environ.get("MAX_HTML_CHARS", str(2 * 1024 * 1024)))
+# sugestão enviada no Retry-After quando a fila está cheia
+RETRY_AFTER_S = int(os.environ.get("RETRY_AFTER_S", "5"))
+
+HOST = os.environ.get("HOST", "127.0.0.1")
+PORT = int(os.environ.get("PORT", "5000"))
+
+
+# ----------------------------
+# Funções executadas nos processos de inferência
+# ----------------------------
+def _init_worker(intra_op_threads):
+    """Inicializador de cada processo: divide os núcleos entre os workers e carrega o modelo."""
+    # sem isso, cada processo usaria todos os núcleos e eles disputariam a CPU entre si
+    os.environ.setdefault("INTRA_OP_THREADS", str(intra_op_threads))
+    # cada worker atende uma requisição por vez: não adianta esperar chunks de outras requisições
+    os.environ.setdefault("BATCH_MAX_WAIT_MS", "0")
+
+    import setup_pln
+
+    setup_pln.load_model()
+    if not setup_pln.model_ready.is_set():
+        raise RuntimeError(setup_pln.startup_error or "falha ao carregar o modelo")
+
+
+def _ping():
+    """Tarefa curta usada para forçar a criação (e o carregamento) dos workers no startup."""
+    # segura o worker por um instante, para os outros pings irem para outros processos
+    time.sleep(0.2)
+    return os.getpid()
+
+
+def _worker_report():
+    import setup_pln
+
+    # as métricas registradas no worker durante a requisição e o estado do seu cache
+    # voltam junto com a resposta (cada processo tem o próprio cache em memória)
+    snapshot = setup_pln.metrics.drain()
+    # o status HTTP é contado pelo processo principal, que sabe o que o cliente recebeu
+    # (ex.: 504 quando o worker terminou depois do timeout)
+    snapshot["counters"] = {
+        key: value for key, value in snapshot["counters"].items() if key[0] != "resumo_requests_total"
+    }
+    return {"pid": os.getpid(), "metrics": snapshot, "cache": setup_pln.cache.stats()}
+
+
+# as funções abaixo devolvem (resultado, relatório); InferencePool.run registra o relatório
+def _generate_summary(data):
+    import setup_pln
+
+    return setup_pln.generate_summary(data), _worker_report()
+
+
+def _stream_summary(data, messages, cancelled):
+    """
+    Versão em streaming: envia cada mensagem pela fila `messages` assim que fica pronta.
+    A primeira mensagem é (status_http, corpo_de_erro_ou_None); None marca o fim.
+    """
+    import setup_pln
+
+    try:
+        options = setup_pln.parse_extractive_options(data)
+    except ValueError as e:
+        messages.put((400, {"error": str(e)}))
+        return None, _worker_report()
+
+    messages.put((200, None))
+    stream = setup_pln.iter_stream_messages(data["html"], options)
+    try:
+        for message in stream:
+            # cliente desconectou ou estourou o tempo: para de gerar
+            if cancelled.is_set():
+                break
+            messages.put(message)
+    finally:
+        # fechar o gerador cancela os chunks que ainda estão na fila do agendador
+        stream.close()
+        messages.put(None)
+    return None, _worker_report()
+
+
+# últimas estatísticas do cache de cada worker, por pid (alimentadas pelas respostas)
+worker_cache_stats = {}
+
+
+def _record(report):
+    metrics.merge(report["metrics"])
+    worker_cache_stats[report["pid"]] = report["cache"]
+
+
+# ----------------------------
+# Controle de admissão
+# ----------------------------
+class InferencePool:
+    """
+    Pool de processos com controle de admissão.
+    - no máximo `workers` tarefas rodando ao mesmo tempo (uma por processo);
+    - no máximo `queue_size` requisições esperando por um processo livre;
+    - o resto é recusado na hora (429), em vez de acumular latência para todos.
+    """
+
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.ready = False
+        # motivo da falha no carregamento dos workers (exposto em /ready)
+        self.startup_error = None
+
+        self._executor = self._create_executor()
+        self._warm_up_task = None
+        # fila + evento compartilháveis com os workers (streaming)
+        self._manager = multiprocessing.get_context("spawn").Manager()
+        # threads que esperam as mensagens do streaming (a fila do Manager só tem get bloqueante);
+        # admit() limita as requisições a workers + queue_size, então nunca falta thread e o
+        # executor padrão do event loop fica livre para o resto do servidor
+        self._readers = ThreadPoolExecutor(max_workers=workers + queue_size, thread_name_prefix="stream-reader")
+        self._slots = asyncio.Semaphore(workers)
+        self._in_flight = 0  # rodando + esperando
+
+    def _create_executor(self):
+        # spawn: cada worker começa limpo (fork + threads do torch não combinam bem)
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(max(1, (os.cpu_count() or 1) // self.workers),),
+        )
+
+    def start(self):
+        """Carrega os workers em segundo plano; /ready informa quando terminou."""
+        self._warm_up_task = asyncio.create_task(self.warm_up())
+
+    async def warm_up(self):
+        """Sobe todos os workers (cada um carrega o modelo no inicializador) antes de marcar pronto."""
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        pids = set()
+        try:
+            # um worker só pega tarefas depois do inicializador; espera até todos responderem
+            while len(pids) < self.workers:
+                pids.update(await asyncio.gather(*[
+                    loop.run_in_executor(executor, _ping) for _ in range(self.workers)
+                ]))
+        except Exception as e:
+            # ex.: o inicializador falhou (modelo não encontrado) e o pool quebrou;
+            # sem isso a exceção some na task e /ready fica 503 sem explicação
+            self.startup_error = f"{type(e).__name__}: {e}"
+            print("Falha ao carregar os workers de inferência:", self.startup_error)
+            return
+        self.startup_error = None
+        self.ready = True
+
+    def restart(self, broken):
+        """
+        Recria o pool depois que um processo morreu (BrokenProcessPool: OOM, segfault...).
+        O pool antigo não aceita mais tarefas; sem recriar, o servidor ficaria 503 para sempre.
+        """
+        if self._executor is not broken:
+            return  # outra requisição já recriou o pool
+        print("Pool de inferência quebrado; recriando os workers")
+        self.ready = False
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create_executor()
+        self.start()
+
+    def admit(self):
+        """Reserva um lugar (rodando ou na fila); False se o servidor está cheio."""
+        if self._in_flight >= self.workers + self.queue_size:
+            return False
+        self._in_flight += 1
+        return True
+
+    def leave(self):
+        """Libera o lugar reservado por admit()."""
+        self._in_flight -= 1
+
+    def _finish(self, cfut):
+        self._slots.release()
+        self.leave()
+        # as métricas do worker entram mesmo quando a requisição já desistiu (timeout):
+        # o trabalho foi feito e deve aparecer em /metrics
+        if not cfut.cancelled() and cfut.exception() is None:
+            _record(cfut.result()[1])
+
+    async def run(self, fn, *args):
+        """
+        Executa fn(*args) num worker, com um lugar já reservado por admit(), que esta função libera.
+        fn devolve (resultado, relatório do worker); só o resultado é retornado.
+        Se a corrotina for cancelada (timeout) enquanto espera na fila, a tarefa nunca chega a
+        um worker; se já estiver rodando, o processo termina o trabalho e só então o slot e o
+        lugar são liberados (o resultado é descartado). Assim a fila nunca passa de queue_size.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            self.leave()
+            raise
+
+        executor = self._executor
+        try:
+            cfut = executor.submit(fn, *args)
+        except BaseException as e:
+            self._slots.release()
+            self.leave()
+            if isinstance(e, BrokenProcessPool):
+                self.restart(executor)
+            raise
+
+        # o slot só volta quando o processo realmente terminou (ou a tarefa foi cancelada)
+        cfut.add_done_callback(lambda done: loop.call_soon_threadsafe(self._finish, done))
+        try:
+            result, _ = await asyncio.wrap_future(cfut)
+            return result
+        except BrokenProcessPool:
+            self.restart(executor)
+            raise
+
+    def channel(self):
+        """Fila de mensagens e evento de cancelamento para uma requisição de streaming."""
+        return self._manager.Queue(), self._manager.Event()
+
+    async def receive(self, messages, timeout):
+        """Espera até `timeout` segundos por uma mensagem da fila (queue.Empty se não chegar nenhuma)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, functools.partial(messages.get, timeout=timeout))
+
+    def shutdown(self):
+        if self._warm_up_task is not None:
+            self._warm_up_task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._readers.shutdown(wait=False, cancel_futures=True)
+        self._manager.shutdown()
+
+
+pool = None
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global pool
+    pool = InferencePool(ASGI_WORKERS, ASGI_QUEUE_SIZE)
+    # o carregamento roda em segundo plano; /ready informa quando terminou
+    pool.start()
+    try:
+        yield
+    finally:
+        pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# mesmo comportamento do CORS(app) do Flask: libera todas as origens
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+
+def _error(status, message, retry_after=None, key="error"):
+    metrics.inc("resumo_requests_total", status=status)
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+    return JSONResponse({key: message}, status_code=status, headers=headers)
+
+
+async def _read_body(request):
+    """Lê o corpo em pedaços; None assim que passar de MAX_BODY_BYTES (vale também para upload chunked)."""
+    body = bytearray()
+    async for piece in request.stream():
+        body.extend(piece)
+        if len(body) > MAX_BODY_BYTES:
+            return None
+    return bytes(body)
+
+
+async def _parse_request(request):
+    """Valida tamanho e JSON da requisição; retorna (data, None) ou (None, resposta_de_erro)."""
+    # limite de tamanho: recusa pelo Content-Length antes de ler o corpo
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > MAX_BODY_BYTES:
+        return None, _error(413, "Requisição maior que o limite permitido")
+
+    # sem Content-Length (Transfer-Encoding: chunked) o limite é conferido durante a leitura
+    body = await _read_body(request)
+    if body is None:
+        return None, _error(413, "Requisição maior que o limite permitido")
+
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        return None, _error(400, "JSON inválido")
+
+    if not isinstance(data, dict) or "html" not in data:
+        return None, _error(400, "Nenhum HTML fornecido")
+    if not isinstance(data["html"], str):
+        return None, _error(400, "'html' deve ser uma string")
+    if len(data["html"]) > MAX_HTML_CHARS:
+        return None, _error(413, "HTML maior que o limite permitido")
+
+    # controle de admissão
+    if not pool.ready:
+        return None, _error(503, "Modelo ainda carregando, tente novamente em instantes", retry_after=RETRY_AFTER_S)
+    if not pool.admit():
+        return None, _error(429, "Servidor ocupado, tente novamente em instantes", retry_after=RETRY_AFTER_S)
+
+    return data, None
+
+
+async def _next_message(messages, task, deadline):
+    """Próxima mensagem do worker; a espera roda numa thread do pool para não travar o event loop."""
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError
+        try:
+            return await pool.receive(messages, min(remaining, 0.5))
+        except queue.Empty:
+            # o worker morreu ou falhou antes de mandar o fim: propaga o erro (ex.: BrokenProcessPool)
+            if task.done() and task.exception() is not None:
+                raise task.exception()
+
+
+# ----------------------------
+# Rotas
+# ----------------------------
+@app.post("/resumir")
+async def resumir(request: Request):
+    data, error = await _parse_request(request)
+    if error is not None:
+        return error
+
+    try:
+        result, status = await asyncio.wait_for(
+            pool.run(_generate_summary, data), REQUEST_TIMEOUT_S,
+        )
+    except asyncio.TimeoutError:
+        metrics.inc("resumo_errors_total")
+        return _error(504, "Tempo limite excedido ao gerar resumo", key="resumo")
+    except BrokenProcessPool:
+        # pool.run já mandou recriar os workers; /ready volta a 200 quando terminarem de carregar
+        metrics.inc("resumo_errors_total")
+        return _error(503, "Processos de inferência indisponíveis", retry_after=RETRY_AFTER_S)
+
+    metrics.inc("resumo_requests_total", status=status)
+    return JSONResponse(result, status_code=status)
+
+
+@app.post("/resumir/stream")
+async def resumir_stream(request: Request):
+    """Mesmo contrato NDJSON do /resumir/stream do Flask (ver setup_pln.iter_stream_messages)."""
+    data, error = await _parse_request(request)
+    if error is not None:
+        return error
+
+    deadline = time.monotonic() + REQUEST_TIMEOUT_S
+    messages, cancelled = pool.channel()
+    task = asyncio.ensure_future(pool.run(_stream_summary, data, messages, cancelled))
+
+    def stop():
+        # avisa o worker para parar; se ainda estiver na fila, a tarefa nem chega a rodar
+        cancelled.set()
+        task.cancel()
+
+    # a primeira mensagem traz o status (400 se as opções extrativas forem inválidas)
+    try:
+        status, body = await _next_message(messages, task, deadline)
+    except asyncio.TimeoutError:
+        stop()
+        metrics.inc("resumo_errors_total")
+        return _error(504, "Tempo limite excedido ao gerar resumo", key="resumo")
+    except BrokenProcessPool:
+        metrics.inc("resumo_errors_total")
+        return _error(503, "Processos de inferência indisponíveis", retry_after=RETRY_AFTER_S)
+
+    # o status 200 sai com a primeira linha; falhas no meio do streaming contam em resumo_errors_total
+    metrics.inc("resumo_requests_total", status=status)
+    if status != 200:
+        return JSONResponse(body, status_code=status)
+
+    async def generate():
+        try:
+            while True:
+                message = await _next_message(messages, task, deadline)
+                if message is None:
+                    break
+                yield json.dumps(message, ensure_ascii=False) + "\n"
+            await task
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            metrics.inc("resumo_errors_total")
+            yield json.dumps({"tipo": "erro", "resumo": "Erro ao gerar resumo"}, ensure_ascii=False) + "\n"
+        finally:
+            # cliente desconectou (ou erro): o worker para no próximo chunk
+            if not task.done():
+                stop()
+
+    # X-Accel-Buffering desliga o buffer de proxies (nginx) para as linhas saírem na hora
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    # cada worker tem o próprio cache: soma os contadores da última resposta de cada um
+    totals = {"workers": len(worker_cache_stats)}
+    for stats in worker_cache_stats.values():
+        for key, value in stats.items():
+            if isinstance(value, bool):
+                totals[key] = value
+            else:
+                totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+@app.get("/health")
+async def health():
+    # o processo principal está de pé e respondendo
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    # 200 só quando todos os workers já carregaram o modelo
+    body = {"ready": bool(pool and pool.ready), "workers": ASGI_WORKERS, "queue_size": ASGI_QUEUE_SIZE}
+    if pool and pool.startup_error:
+        body["error"] = pool.startup_error
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    # formato texto do Prometheus (etapas, chunks por requisição, tokens/s, erros e fallbacks)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+if __name__ == "__main__":
+    # um único processo uvicorn: o paralelismo de CPU vem do pool de inferência
+    uvicorn.run(app, host=HOST, port=PORT)
@@ -0,0 +1,880 @@
+# torch e transformers NÃO são importados aqui: são pesados e só são necessários para
+# carregar o modelo, o que acontece em segundo plano (ver load_model mais abaixo)
+# através do módulo inference_backends.
+# Assim o servidor sobe rápido e já responde /health enquanto o modelo carrega.
+
+# importa classes do Flask para criar a API:
+# - Flask: cria a aplicação
+# - request: obtém dados da requisição (JSON enviado pelo client)
+# - jsonify: transforma dicionários Python em resposta JSON
+# - Response/stream_with_context: resposta HTTP em streaming (usada em /resumir/stream)
+from flask import Flask, request, jsonify, Response, stream_with_context
+
+# importa CORS para permitir chamadas cross-origin (útil para front-end rodando em outra origem)
+from flask_cors import CORS
+
+# parser HTML do lxml usado em modo "target": o texto é extraído durante o parse,
+# em pedaços, sem montar a árvore do documento (bem mais leve que o BeautifulSoup)
+from lxml import etree
+
+# funções do NLTK:
+# - sent_tokenize: divide texto em sentenças
+# - stopwords: lista de stopwords (palavras comuns) para português
+from nltk.tokenize import sent_tokenize
+from nltk.corpus import stopwords
+
+# importa o nltk para verificar recursos locais (punkt, stopwords)
+import nltk
+
+# expressão regular (regex) via módulo re
+import re
+
+# os: leitura de configurações via variáveis de ambiente
+import os
+
+# lru_cache: carrega as stopwords uma única vez por processo
+from functools import lru_cache
+
+# threading: carregamento do modelo em segundo plano
+import threading
+
+# json/time: serialização das mensagens do streaming e medição de tempo por chunk
+import json
+import time
+
+# as_completed: devolve os futures na ordem em que ficam prontos
+from concurrent.futures import as_completed
+
+# agendador que junta chunks de várias requisições em lotes para o modelo
+from batch_scheduler import BatchScheduler
+
+# cache de resumos por chunk (memória LRU + SQLite opcional)
+from chunk_cache import ChunkCache, make_key
+
+# backends de inferência (fp32 / int8 / onnx), todos com a mesma interface, e o modelo usado
+from inference_backends import MODEL_NAME, create_backend
+
+# etapa extrativa (TextRank) que limita quantas sentenças seguem para o modelo abstrativo
+from extractive import METHODS as EXTRACTIVE_METHODS, select_sentences, sentence_scores
+
+# métricas de execução (histogramas por etapa, contadores), expostas em /metrics
+from metrics import registry as metrics
+
+
+# Cria a aplicação Flask. __name__ ajuda o Flask a localizar recursos relativos.
+app = Flask(__name__)
+
+# Habilita CORS para todas as rotas da aplicação (permite que o front-end faça requests)
+CORS(app)
+
+
+# ----------------------------
+# Preparação do NLTK (recursos)
+# ----------------------------
+# Os recursos NÃO são baixados em tempo de execução (isso acessava a rede a cada start e
+# travava em máquinas sem internet). Eles precisam estar instalados antes, por exemplo:
+#   python -m nltk.downloader punkt punkt_tab stopwords
+# cada item: (nome para a mensagem de erro, chamada que usa o recurso como o pipeline usa).
+# Procurar arquivos não basta: o 'punkt' antigo (pickle) continua no disco depois de uma
+# atualização, mas as versões novas do NLTK só carregam o 'punkt_tab'. A chamada real
+# falha exatamente quando o pipeline falharia.
+NLTK_RESOURCES = [
+    ("punkt", lambda: sent_tokenize("Teste.", language="portuguese")),
+    ("stopwords", lambda: stopwords.words("portuguese")),
+]
+
+
+def check_nltk_resources():
+    """Verifica localmente os recursos do NLTK; levanta RuntimeError se algum faltar."""
+    missing = []
+    for name, probe in NLTK_RESOURCES:
+        try:
+            probe()
+        except LookupError:
+            missing.append(name)
+
+    if missing:
+        raise RuntimeError(
+            "Recursos do NLTK ausentes: " + ", ".join(missing)
+            + ". Instale com: python -m nltk.downloader punkt punkt_tab stopwords"
+        )
+
+
+# ----------------------------
+# Configuração do modelo de summarization
+# ----------------------------
+# MODEL_LOCAL_ONLY=1: usa só o cache local do Hugging Face, sem acessar a rede (máquinas isoladas)
+MODEL_LOCAL_ONLY = os.environ.get("MODEL_LOCAL_ONLY", "0") == "1"
+
+# backend de inferência: "fp32" (pipeline padrão), "int8" (quantização dinâmica) ou "onnx" (ONNX Runtime)
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "fp32")
+# threads intra-op/inter-op do PyTorch ou do ONNX Runtime (vazio = padrão da biblioteca)
+INTRA_OP_THREADS = int(os.environ.get("INTRA_OP_THREADS", "0")) or None
+INTER_OP_THREADS = int(os.environ.get("INTER_OP_THREADS", "0")) or None
+# pasta para salvar/reaproveitar o modelo exportado para ONNX
+ONNX_EXPORT_DIR = os.environ.get("ONNX_EXPORT_DIR") or None
+
+# WARMUP=1: faz uma geração curta depois de carregar o modelo, para a primeira
+# requisição real não pagar o custo de inicialização (alocações, caches internos)
+WARMUP = os.environ.get("WARMUP", "1") == "1"
+
+# preenchidos por load_model(), em segundo plano
+backend = None
+tokenizer = None
+
+# estado da inicialização, exposto em /ready
+model_ready = threading.Event()
+startup_timings = {}   # fase -> duração em ms
+startup_error = None   # mensagem de erro, se a inicialização falhar
+
+
+def _timed_phase(name, fn):
+    """Executa uma fase da inicialização, registra e imprime quanto tempo levou."""
+    start = time.perf_counter()
+    result = fn()
+    startup_timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    print(f"[startup] {name}: {startup_timings[name]:.0f} ms")
+    return result
+
+
+def load_model():
+    """
+    Carrega recursos e modelo em fases cronometradas:
+    nltk -> fases do backend (import, tokenizer, model, ...) -> warmup.
+    Ao final, marca o servidor como pronto (model_ready).
+    """
+    global backend, tokenizer, startup_error
+
+    total_start = time.perf_counter()
+    try:
+        _timed_phase("nltk", check_nltk_resources)
+        portuguese_stopwords()  # carrega a lista uma vez, fora do caminho das requisições
+
+        print("Backend de inferência:", INFERENCE_BACKEND)
+        backend = create_backend(
+            INFERENCE_BACKEND,
+            MODEL_NAME,
+            local_files_only=MODEL_LOCAL_ONLY,
+            intra_op_threads=INTRA_OP_THREADS,
+            inter_op_threads=INTER_OP_THREADS,
+            onnx_export_dir=ONNX_EXPORT_DIR,
+            timer=_timed_phase,
+        )
+        tokenizer = backend.tokenizer
+
+        if WARMUP:
+            _timed_phase(
+                "warmup",
+                lambda: summarize_batch(
+                    ["O modelo de resumo está sendo aquecido antes da primeira requisição."],
+                    max_length=20,
+                    min_length=5,
+                ),
+            )
+
+        startup_timings["total"] = round((time.perf_counter() - total_start) * 1000, 1)
+        print(f"[startup] pronto em {startup_timings['total']:.0f} ms")
+        model_ready.set()
+
+    except Exception as e:
+        startup_error = str(e)
+        print("Erro ao inicializar o modelo:", e)
+
+
+def start_background_loading():
+    """Dispara load_model numa thread daemon; o servidor HTTP sobe sem esperar."""
+    thread = threading.Thread(target=load_model, name="model-loader", daemon=True)
+    thread.start()
+    return thread
+
+
+def not_ready_response():
+    """Resposta 503 usada enquanto o modelo ainda não está pronto."""
+    metrics.inc("resumo_requests_total", status=503)
+    resp = jsonify({"error": startup_error or "Modelo ainda carregando, tente novamente em instantes"})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = "5"
+    return resp
+
+
+# ----------------------------
+# Inferência em lotes (micro-batching)
+# ----------------------------
+# tamanho máximo de cada lote enviado ao modelo
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "8"))
+# tempo máximo (ms) que um chunk espera por outros chunks para formar um lote
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", "20"))
+
+
+def count_tokens(text):
+    """Número de tokens do texto (tokenizador do modelo, ou palavras no backend stub)."""
+    if tokenizer is not None:
+        return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+    return len(text.split())
+
+
+def summarize_batch(texts, max_length=200, min_length=80, do_sample=False):
+    """Resume uma lista de textos numa única chamada ao backend (o backend faz o padding do lote)."""
+    start = time.perf_counter()
+    summaries = backend.generate(texts, max_length=max_length, min_length=min_length, do_sample=do_sample)
+    elapsed = time.perf_counter() - start
+
+    # vazão de geração do lote (tokens de saída por segundo)
+    generated = sum(count_tokens(summary) for summary in summaries)
+    metrics.inc("resumo_generated_tokens_total", generated)
+    if elapsed > 0:
+        metrics.observe("resumo_generation_tokens_per_second", generated / elapsed)
+
+    return summaries
+
+
+# agendador compartilhado por todas as requisições: os chunks são agrupados por tamanho
+# (número de palavras) para reduzir o padding dentro de cada lote
+scheduler = BatchScheduler(
+    summarize_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    length_fn=lambda text: len(text.split()),
+)
+
+
+# ----------------------------
+# Cache de resumos por chunk
+# ----------------------------
+# limite de memória do cache (bytes)
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# arquivo SQLite para persistir o cache entre reinícios (vazio = só memória)
+CACHE_DB_PATH = os.environ.get("CACHE_DB_PATH") or None
+# máximo de linhas no SQLite (as gravadas há mais tempo saem primeiro; 0 = sem limite)
+CACHE_DB_MAX_ROWS = int(os.environ.get("CACHE_DB_MAX_ROWS", "200000"))
+
+cache = ChunkCache(max_bytes=CACHE_MAX_BYTES, db_path=CACHE_DB_PATH, max_rows=CACHE_DB_MAX_ROWS)
+
+
+# ----------------------------
+# Funções auxiliares de pré-processamento
+# ----------------------------
+
+# tags que normalmente não são conteúdo textual relevante (o conteúdo delas é descartado)
+SKIP_TAGS = frozenset(["script", "style", "img", "nav", "footer", "aside", "form", "button", "iframe", "header"])
+
+# tamanho dos pedaços (caracteres) entregues ao parser de HTML
+HTML_FEED_SIZE = 64 * 1024
+
+# regex pré-compiladas (compiladas uma vez, no import)
+# sequências de whitespace (quebras de linha, tabs, múltiplos espaços)
+_WHITESPACE_RE = re.compile(r"\s+")
+# [^\w\s,.!?;:] -> tudo que não for palavra (\w), espaço (\s) ou esses sinais
+_SPECIAL_CHARS_RE = re.compile(r"[^\w\s,.!?;:]")
+# "palavras" usadas na filtragem de sentenças
+_WORD_RE = re.compile(r"\w+")
+
+
+class _TextExtractor:
+    """
+    Alvo ("target") do parser HTML do lxml: recebe os eventos de abertura/fechamento de
+    tag e de texto e vai juntando os nós de texto fora das SKIP_TAGS.
+    Equivale a BeautifulSoup(html, "lxml") + decompose() das SKIP_TAGS +
+    get_text(separator=" ", strip=True), mas sem guardar a árvore na memória.
+    """
+
+    def __init__(self):
+        self.parts = []      # nós de texto já "stripados" e não vazios
+        self._buffer = []    # pedaços do nó de texto atual
+        self._skip_depth = 0 # > 0 enquanto estivermos dentro de uma SKIP_TAG
+
+    def _flush(self):
+        # fecha o nó de texto atual (um nó termina em qualquer tag ou comentário)
+        if self._buffer:
+            text = "".join(self._buffer).strip()
+            self._buffer.clear()
+            if text and not self._skip_depth:
+                self.parts.append(text)
+
+    def start(self, tag, attrib):
+        self._flush()
+        if self._skip_depth or tag in SKIP_TAGS:
+            self._skip_depth += 1
+
+    def end(self, tag):
+        self._flush()
+        if self._skip_depth:
+            self._skip_depth -= 1
+
+    def data(self, data):
+        self._buffer.append(data)
+
+    def comment(self, text):
+        # comentários não entram no texto, mas separam os nós ao redor
+        self._flush()
+
+    def close(self):
+        self._flush()
+        return " ".join(self.parts)
+
+
+def extract_text(html):
+    """
+    Extrai o texto visível do HTML em streaming.
+    - html: string ou iterável de pedaços de string (ex.: leitura de um arquivo grande).
+    """
+    # huge_tree: permite nós de texto muito grandes (páginas com vários MB)
+    parser = etree.HTMLParser(target=_TextExtractor(), huge_tree=True)
+
+    if isinstance(html, str):
+        # entrega a string em pedaços para o parser não precisar de uma cópia inteira
+        for i in range(0, len(html), HTML_FEED_SIZE):
+            parser.feed(html[i:i + HTML_FEED_SIZE])
+    else:
+        for piece in html:
+            parser.feed(piece)
+
+    # close() devolve o retorno de _TextExtractor.close(); sem nenhum pedaço alimentado
+    # (ex.: html vazio) o lxml levanta "no element found": página vazia não tem texto
+    try:
+        return parser.close() or ""
+    except etree.XMLSyntaxError:
+        return ""
+
+
+def clean_html(html):
+    """Remove tags desnecessárias e retorna apenas o texto limpo."""
+    # extrai o texto fora das tags irrelevantes (nós de texto unidos por espaço)
+    text = extract_text(html)
+
+    # passa por uma limpeza adicional (função abaixo) e retorna o texto limpo
+    return clean_text(text)
+
+
+def clean_text(text):
+    """Remove múltiplos espaços, quebras e caracteres especiais desnecessários."""
+    # substitui sequências de whitespace por um único espaço
+    text = _WHITESPACE_RE.sub(" ", text)
+
+    # remove caracteres que não sejam letras/dígitos/underline, espaços e sinais de pontuação básicos
+    text = _SPECIAL_CHARS_RE.sub("", text)
+
+    # remove espaços nas pontas e retorna
+    return text.strip()
+
+
+@lru_cache(maxsize=1)
+def portuguese_stopwords():
+    """Stopwords do português como frozenset (busca rápida), carregadas uma vez."""
+    return frozenset(stopwords.words("portuguese"))
+
+
+def filter_sentences(text, min_words=5):
+    """
+    Divide o texto em sentenças e filtra sentenças curtas ou com alta proporção de stopwords.
+    - min_words: número mínimo de palavras para considerar a sentença relevante.
+    """
+    # tokeniza o texto em sentenças (usando 'punkt' do NLTK em português)
+    sentences = sent_tokenize(text, language="portuguese")
+
+    stopwords_pt = portuguese_stopwords()
+
+    result = []  # lista final de sentenças relevantes
+
+    # para cada sentença:
+    for sent in sentences:
+        # extrai "palavras" alfabéticas via regex e filtra tokens que não são alfabéticos
+        words = [w for w in _WORD_RE.findall(sent) if w.isalpha()]
+
+        # se a sentença tem menos que min_words palavras, ignora
+        if len(words) >= min_words:
+            # calcula a proporção de stopwords na sentença
+            sw_ratio = sum(1 for w in words if w.lower() in stopwords_pt) / len(words)
+
+            # se a proporção de stopwords for menor que 0.7 (heurística), considera relevante
+            if sw_ratio < 0.7:
+                result.append(sent)
+
+    # retorna a lista de sentenças filtradas
+    return result
+
+
+def _group(sizes, budget):
+    """
+    Agrupa posições consecutivas em blocos cujo tamanho somado não passa de budget.
+    Uma sentença maior que o budget sozinha vira um bloco próprio.
+    Retorna a lista de blocos, cada um com as posições das sentenças que o compõem.
+    """
+    groups = []           # lista de blocos finais (cada bloco é uma lista de posições)
+    current_group = []    # posições das sentenças do bloco atual
+    current_size = 0      # tamanho acumulado do bloco atual
+
+    for pos, size in enumerate(sizes):
+        # se adicionar a sentença atual excede o budget, fecha o bloco atual
+        if current_size + size > budget:
+            if current_group:
+                groups.append(current_group)
+            # inicia novo bloco com a sentença atual
+            current_group = [pos]
+            current_size = size
+        else:
+            # caso contrário, acrescenta a sentença ao bloco atual
+            current_group.append(pos)
+            current_size += size
+
+    # adiciona o último bloco se existir conteúdo
+    if current_group:
+        groups.append(current_group)
+
+    return groups
+
+
+# orçamento de tokens por chunk: perto da janela de entrada do ptt5 (512), com folga
+# para o token de fim de sequência e pequenas diferenças ao juntar sentenças
+CHUNK_MAX_TOKENS = int(os.environ.get("CHUNK_MAX_TOKENS", "480"))
+
+
+def token_counts(sentences, tokenizer):
+    """Número de tokens de cada sentença (tokenização em lote: a lista inteira de uma vez)."""
+    encoded = tokenizer(sentences, add_special_tokens=False)["input_ids"]
+    return [len(ids) for ids in encoded]
+
+
+def _token_budget(tokenizer, max_tokens):
+    # nunca passa da janela do modelo (alguns tokenizadores trazem um valor "infinito")
+    model_max = getattr(tokenizer, "model_max_length", None)
+    if model_max and model_max < 100_000:
+        return min(max_tokens, model_max - 1)
+    return max_tokens
+
+
+def sentence_sizes(sentences):
+    """Tamanho de cada sentença na unidade do chunking: tokens (com tokenizador) ou palavras."""
+    if not sentences:
+        return []
+    if tokenizer is not None:
+        return token_counts(sentences, tokenizer)
+    return [len(sent.split()) for sent in sentences]
+
+
+def chunk_budget():
+    """Capacidade de um chunk, na mesma unidade de sentence_sizes."""
+    if tokenizer is not None:
+        return _token_budget(tokenizer, CHUNK_MAX_TOKENS)
+    return 150
+
+
+# ----------------------------
+# Etapa extrativa (pré-seleção de sentenças)
+# ----------------------------
+# método padrão de centralidade: "tfidf" (TextRank sobre TF-IDF) ou "embeddings" (sentence-transformers)
+EXTRACTIVE_METHOD = os.environ.get("EXTRACTIVE_METHOD", "tfidf")
+# limite rígido de chunks (chamadas de geração) por requisição, depois da etapa extrativa
+EXTRACTIVE_MAX_CHUNKS = int(os.environ.get("EXTRACTIVE_MAX_CHUNKS", "4"))
+
+
+def _positive_int(data, field):
+    value = data.get(field)
+    if value is None:
+        return None
+    # bool é subclasse de int em Python, mas não é um valor válido aqui
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise ValueError(f"'{field}' deve ser um inteiro positivo")
+    return value
+
+
+def parse_extractive_options(data):
+    """
+    Lê as opções da etapa extrativa do JSON da requisição (todas opcionais):
+    - max_sentencas: mantém no máximo K sentenças;
+    - orcamento_tokens: soma máxima de tokens das sentenças mantidas;
+    - metodo_extrativo: "tfidf" ou "embeddings".
+    Levanta ValueError se alguma opção for inválida.
+    """
+    top_k = _positive_int(data, "max_sentencas")
+    budget = _positive_int(data, "orcamento_tokens")
+    method = data.get("metodo_extrativo", EXTRACTIVE_METHOD)
+    if method not in EXTRACTIVE_METHODS:
+        raise ValueError(f"'metodo_extrativo' deve ser um de: {', '.join(EXTRACTIVE_METHODS)}")
+    return {"top_k": top_k, "budget": budget, "method": method}
+
+
+def preselect_chunks(sentences, top_k=None, budget=None, method=EXTRACTIVE_METHOD):
+    """
+    Mantém as sentenças mais centrais (na ordem original) e monta os chunks só com elas.
+    O orçamento pedido nunca passa de EXTRACTIVE_MAX_CHUNKS chunks cheios, então o custo de
+    geração por requisição fica limitado mesmo para páginas muito longas.
+    Retorna (chunks, info), onde info diz quantas sentenças e chunks foram descartados.
+    """
+    sizes = sentence_sizes(sentences)
+    capacity = chunk_budget()
+
+    max_budget = EXTRACTIVE_MAX_CHUNKS * capacity
+    budget = max_budget if budget is None else min(budget, max_budget)
+
+    stop_words = list(portuguese_stopwords())
+    kept, scores = select_sentences(
+        sentences, sizes, top_k=top_k, budget=budget, method=method, stop_words=stop_words,
+    )
+
+    # o empacotamento guloso pode abrir um chunk a mais que o orçamento sugere; para
+    # manter o limite rígido de chamadas de geração, as sentenças mantidas de menor
+    # escore (e não as últimas do texto) saem até o reempacotamento caber
+    groups = _group([sizes[i] for i in kept], capacity)
+    if len(groups) > EXTRACTIVE_MAX_CHUNKS:
+        if scores is None:
+            # tudo coube no orçamento e o ranking não tinha sido calculado
+            scores = sentence_scores(sentences, method=method, stop_words=stop_words)
+        # ordem de saída: menor escore primeiro (empates: a mais adiante no texto)
+        drop_order = sorted(kept, key=lambda i: (scores[i], -i))
+        while len(groups) > EXTRACTIVE_MAX_CHUNKS:
+            kept.remove(drop_order.pop(0))
+            groups = _group([sizes[i] for i in kept], capacity)
+
+    groups = [[kept[pos] for pos in group] for group in groups]
+    kept = [i for group in groups for i in group]
+    chunks = [" ".join(sentences[i] for i in group) for group in groups]
+
+    # quantos chunks a página inteira teria gerado sem a etapa extrativa
+    all_chunks = len(_group(sizes, capacity))
+
+    info = {
+        "metodo": method,
+        "sentencas_total": len(sentences),
+        "sentencas_descartadas": len(sentences) - len(kept),
+        "chunks_descartados": all_chunks - len(chunks),
+    }
+    return chunks, info
+
+
+def iter_chunk_summaries(chunks, max_length=200, min_length=80, first_alone=False):
+    """
+    Gera (indice, resumo, tempo_ms) para cada chunk, na ordem em que os resumos ficam prontos.
+    Chunks já resumidos antes (mesmo texto, modelo e parâmetros) vêm do cache na hora.
+    Se o gerador for fechado antes do fim (ex.: cliente desconectou), os chunks que
+    ainda estão na fila do agendador são cancelados.
+    - max_length/min_length definem limites do summary gerado.
+    - first_alone: sem nada no cache, o primeiro chunk vai num lote só dele (streaming),
+      para o cliente receber conteúdo antes de todos os chunks ficarem prontos.
+    """
+    params = {"max_length": max_length, "min_length": min_length, "do_sample": False}
+    start = time.perf_counter()
+
+    # consulta o cache; só os chunks ausentes vão para o modelo
+    # o backend entra na chave: int8/onnx podem gerar textos um pouco diferentes do fp32
+    keys = [make_key(chunk, f"{MODEL_NAME}:{INFERENCE_BACKEND}", **params) for chunk in chunks]
+    cached = [cache.get(key) for key in keys]
+    missing = [i for i, summary in enumerate(cached) if summary is None]
+
+    # envia os chunks ausentes de uma vez (antes de devolver os do cache, para a geração
+    # já começar); o agendador junta com chunks de outras requisições
+    if first_alone and len(missing) == len(chunks) > 1:
+        # num lote único, todos os chunks terminariam juntos com a mensagem final
+        futures = scheduler.submit([chunks[missing[0]]], batch_limit=1, **params)
+        futures += scheduler.submit([chunks[i] for i in missing[1:]], **params)
+    else:
+        futures = scheduler.submit([chunks[i] for i in missing], **params)
+    index_of = {fut: i for i, fut in zip(missing, futures)}
+
+    try:
+        for i, summary in enumerate(cached):
+            if summary is not None:
+                yield i, summary, (time.perf_counter() - start) * 1000
+
+        for fut in as_completed(futures):
+            i = index_of[fut]
+            try:
+                summary = fut.result()
+            except Exception as e:
+                # em caso de erro ao resumir um chunk (por exemplo, tokenização ou OOM),
+                # imprime o erro no log e usa o próprio chunk como fallback (resumo literal);
+                # o fallback não vai para o cache, para que o chunk seja tentado de novo depois
+                print("Erro no chunk:", e)
+                metrics.inc("resumo_chunk_fallbacks_total")
+                summary = chunks[i]  # fallback
+            else:
+                # falha ao gravar no cache (ex.: disco cheio) não pode trocar um resumo bom pelo fallback
+                try:
+                    cache.put(keys[i], summary)
+                except Exception as e:
+                    print("Erro ao gravar no cache:", e)
+            yield i, summary, (time.perf_counter() - start) * 1000
+    finally:
+        # cancela o que ainda não começou a ser gerado (não tem efeito nos já concluídos)
+        for fut in futures:
+            fut.cancel()
+
+
+def summarize_chunks(chunks, max_length=200, min_length=80):
+    """
+    Resume cada chunk via agendador de lotes e concatena os resumos.
+    - max_length/min_length definem limites do summary gerado.
+    """
+    summaries = [None] * len(chunks)
+
+    # os resumos chegam fora de ordem; o índice recoloca cada um no lugar certo do texto
+    for i, summary, _ in iter_chunk_summaries(chunks, max_length=max_length, min_length=min_length):
+        summaries[i] = summary
+
+    # junta todos os resumos em uma única string coesa
+    return " ".join(summaries)
+
+
+def build_sections(sentences, resumo_coeso):
+    """Heurística simples para detectar "títulos" (se quiser gerar tópicos)."""
+    sections = []
+    for sent in sentences:
+        # se a sentença estiver em maiúsculas ou contém ":" consideramos potencial título
+        if sent.isupper() or ":" in sent:
+            sections.append({"titulo": sent, "resumo": ""})
+
+    # se encontrou títulos, atribui o mesmo resumo_coeso a cada seção (simplificação)
+    if sections:
+        for i, sec in enumerate(sections):
+            sec["resumo"] = resumo_coeso  # NOTA: aqui é simplificado; pode ser melhorado
+    else:
+        sections = None  # se não há títulos, devolve None para evitar lista vazia
+
+    return sections
+
+
+# ----------------------------
+# Pipeline completo de /resumir
+# ----------------------------
+def timed_stage(name, timings, fn, *args, **kwargs):
+    """Executa uma etapa do pipeline, guardando a duração (s) em timings e no histograma da etapa."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    timings[name] = elapsed
+    metrics.observe("resumo_stage_seconds", elapsed, stage=name)
+    return result
+
+
+def run_pipeline(html, options, timings):
+    """
+    clean_html -> filter_sentences -> preselect_chunks -> summarize_chunks, cronometrando cada etapa.
+    Retorna (sentences, chunks, extrativo, resumo_coeso); sem sentenças relevantes, chunks é None.
+    Usado pelas rotas e pelo benchmark offline (benchmark.py), para medirem o mesmo caminho.
+    """
+    # limpa o HTML e converte para texto puro
+    cleaned_text = timed_stage("clean_html", timings, clean_html, html)
+
+    # filtra sentenças relevantes
+    sentences = timed_stage("filter_sentences", timings, filter_sentences, cleaned_text)
+    if not sentences:
+        return sentences, None, None, None
+
+    # mantém só as sentenças mais centrais e divide em chunks
+    chunks, extrativo = timed_stage("preselect_chunks", timings, preselect_chunks, sentences, **options)
+    metrics.observe("resumo_chunks_per_request", len(chunks))
+
+    # resume os chunks
+    resumo_coeso = timed_stage(
+        "summarize_chunks", timings, summarize_chunks, chunks, max_length=200, min_length=80,
+    )
+    return sentences, chunks, extrativo, resumo_coeso
+
+
+def generate_summary(data, timings=None):
+    """
+    Executa o pipeline de /resumir para o JSON recebido e retorna (corpo, status_http).
+    Não depende do Flask: também é chamado pelos processos de inferência do servidor ASGI.
+    - timings: dict opcional que recebe a duração de cada etapa.
+    """
+    body, status = _generate_summary(data, {} if timings is None else timings)
+    metrics.inc("resumo_requests_total", status=status)
+    if status >= 500:
+        metrics.inc("resumo_errors_total")
+    return body, status
+
+
+def _generate_summary(data, timings):
+    # valida entrada: espera um objeto JSON com 'html' (listas e outros tipos não têm campos)
+    if not isinstance(data, dict) or "html" not in data:
+        return {"error": "Nenhum HTML fornecido"}, 400
+
+    # opções da etapa extrativa (orçamento por requisição)
+    try:
+        options = parse_extractive_options(data)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    try:
+        html = data["html"]  # texto/HTML enviado pelo front
+
+        sentences, chunks, extrativo, resumo_coeso = run_pipeline(html, options, timings)
+
+        # se não encontrou sentenças relevantes, retorna mensagem amigável
+        if chunks is None:
+            return {"resumo": "Não foi possível extrair texto relevante da página."}, 200
+
+        sections = build_sections(sentences, resumo_coeso)
+
+        # retorna o resumo coeso, as seções (ou null) e o que a etapa extrativa descartou
+        return {"resumo_coeso": resumo_coeso, "sections": sections, "extrativo": extrativo}, 200
+
+    except Exception as e:
+        # em caso de exceção, imprime no console e retorna erro 500 ao front
+        print("Erro ao gerar resumo:", e)
+        return {"resumo": "Erro ao gerar resumo"}, 500
+
+
+# ----------------------------
+# Rota HTTP para resumo (/resumir)
+# ----------------------------
+@app.route("/resumir", methods=["POST"])
+def resumir():
+    # obtém o JSON enviado pelo client
+    data = request.get_json()
+
+    # enquanto o modelo carrega em segundo plano, avisa o client para tentar de novo
+    # (requisições sem 'html' continuam recebendo 400 de generate_summary)
+    if isinstance(data, dict) and "html" in data and not model_ready.is_set():
+        return not_ready_response()
+
+    body, status = generate_summary(data)
+    return jsonify(body), status
+
+
+# ----------------------------
+# Rota HTTP para resumo em streaming (/resumir/stream)
+# ----------------------------
+def ndjson(obj):
+    """Serializa uma mensagem do streaming como uma linha de NDJSON."""
+    return json.dumps(obj, ensure_ascii=False) + "\n"
+
+
+def iter_stream_messages(html, options):
+    """
+    Pipeline de /resumir/stream: gera as mensagens (dicts) na ordem em que devem ser enviadas.
+    Não depende do Flask: também é usado pelos processos de inferência do servidor ASGI.
+    - {"tipo": "chunk", "indice", "total", "resumo", "tempo_ms"} assim que cada chunk fica pronto;
+    - {"tipo": "final", "resumo_coeso", "sections", "extrativo"} no fim, com o texto na ordem original;
+    - {"tipo": "erro", "resumo"} se algo falhar no meio do caminho.
+    """
+    timings = {}
+    try:
+        cleaned_text = timed_stage("clean_html", timings, clean_html, html)
+        sentences = timed_stage("filter_sentences", timings, filter_sentences, cleaned_text)
+
+        if not sentences:
+            yield {"tipo": "final", "resumo": "Não foi possível extrair texto relevante da página."}
+            return
+
+        chunks, extrativo = timed_stage("preselect_chunks", timings, preselect_chunks, sentences, **options)
+        metrics.observe("resumo_chunks_per_request", len(chunks))
+        summaries = [None] * len(chunks)
+        start = time.perf_counter()
+
+        # se o cliente desconectar, quem consome fecha este gerador e o "finally" de
+        # iter_chunk_summaries cancela os chunks que ainda não foram gerados
+        for i, summary, elapsed in iter_chunk_summaries(chunks, max_length=200, min_length=80, first_alone=True):
+            summaries[i] = summary
+            yield {
+                "tipo": "chunk",
+                "indice": i,
+                "total": len(chunks),
+                "resumo": summary,
+                "tempo_ms": round(elapsed, 1),
+            }
+
+        metrics.observe("resumo_stage_seconds", time.perf_counter() - start, stage="summarize_chunks")
+
+        resumo_coeso = " ".join(summaries)
+        sections = build_sections(sentences, resumo_coeso)
+        yield {
+            "tipo": "final",
+            "resumo_coeso": resumo_coeso,
+            "sections": sections,
+            "extrativo": extrativo,
+        }
+
+    except Exception as e:
+        print("Erro ao gerar resumo:", e)
+        metrics.inc("resumo_errors_total")
+        yield {"tipo": "erro", "resumo": "Erro ao gerar resumo"}
+
+
+@app.route("/resumir/stream", methods=["POST"])
+def resumir_stream():
+    """
+    Mesmo pipeline de /resumir, mas a resposta é NDJSON (uma mensagem JSON por linha);
+    o formato das mensagens está em iter_stream_messages.
+    """
+    data = request.get_json()
+
+    if not isinstance(data, dict) or "html" not in data:
+        metrics.inc("resumo_requests_total", status=400)
+        return jsonify({"error": "Nenhum HTML fornecido"}), 400
+
+    if not model_ready.is_set():
+        return not_ready_response()
+
+    try:
+        options = parse_extractive_options(data)
+    except ValueError as e:
+        metrics.inc("resumo_requests_total", status=400)
+        return jsonify({"error": str(e)}), 400
+
+    # o status 200 sai com a primeira linha; falhas no meio do streaming contam em resumo_errors_total
+    metrics.inc("resumo_requests_total", status=200)
+
+    def generate():
+        messages = iter_stream_messages(data["html"], options)
+        try:
+            for message in messages:
+                yield ndjson(message)
+        finally:
+            # cliente desconectou: fecha o pipeline na hora (cancela os chunks ainda na fila)
+            messages.close()
+
+    # stream_with_context mantém o contexto da requisição vivo enquanto o gerador roda;
+    # X-Accel-Buffering desliga o buffer de proxies (nginx) para as linhas saírem na hora
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ----------------------------
+# Rota HTTP com estatísticas do cache (/cache/stats)
+# ----------------------------
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    # contadores de acertos, faltas e remoções do cache de chunks
+    return jsonify(cache.stats())
+
+
+# ----------------------------
+# Rota HTTP de métricas (/metrics), no formato do Prometheus
+# ----------------------------
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+# ----------------------------
+# Rotas de liveness (/health) e readiness (/ready)
+# ----------------------------
+@app.route("/health", methods=["GET"])
+def health():
+    # o processo está de pé e respondendo (não depende do modelo)
+    return jsonify({"status": "ok"})
+
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    # 200 só depois que o modelo foi carregado (e aquecido); inclui a duração de cada fase
+    body = {"ready": model_ready.is_set(), "fases_ms": startup_timings}
+    if startup_error:
+        body["error"] = startup_error
+    return jsonify(body), (200 if model_ready.is_set() else 503)
+
+
+# executa a app Flask em modo debug quando o script for executado diretamente
+if __name__ == "__main__":
+    debug = os.environ.get("FLASK_DEBUG", "1") == "1"
+
+    # com o reloader do modo debug, o processo pai só vigia arquivos;
+    # o modelo é carregado apenas no processo filho, que atende as requisições
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_loading()
+
+    app.run(debug=debug)
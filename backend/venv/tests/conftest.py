@@ -0,0 +1,18 @@
+# configuração comum dos testes
+#
+# Os módulos do backend são importados "soltos" (ex.: `import setup_pln`), como no app;
+# por isso a pasta do backend entra no sys.path. O backend de inferência é o stub
+# (sem download de modelo) e sem espera por companheiros de lote, para os testes serem rápidos.
+#
+# Uso (a partir de backend/venv):
+#   python -m pytest tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# precisa vir antes do import de setup_pln, que lê a configuração no import
+os.environ.setdefault("INFERENCE_BACKEND", "stub")
+os.environ.setdefault("BATCH_MAX_WAIT_MS", "0")
+os.environ.pop("CACHE_DB_PATH", None)
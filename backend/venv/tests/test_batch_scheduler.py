@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+from batch_scheduler import BatchScheduler
+
+
+def upper_batch(texts, **params):
+    return [text.upper() for text in texts]
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(batch_fn, **kwargs):
+        scheduler = BatchScheduler(batch_fn, **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.close()
+
+
+def test_results_come_back_in_submission_order(make_scheduler):
+    calls = []
+
+    def batch_fn(texts, **params):
+        calls.append(list(texts))
+        return upper_batch(texts)
+
+    scheduler = make_scheduler(batch_fn, max_batch_size=8, max_wait_ms=50)
+    texts = ["ccc", "a", "bbbbb", "dd"]
+    futures = scheduler.submit(texts)
+
+    assert [fut.result(timeout=5) for fut in futures] == ["CCC", "A", "BBBBB", "DD"]
+    # o lote é ordenado por tamanho antes da geração
+    assert calls == [["a", "dd", "ccc", "bbbbb"]]
+
+
+def test_items_with_different_params_never_share_a_batch(make_scheduler):
+    calls = []
+
+    def batch_fn(texts, **params):
+        calls.append((list(texts), params["max_length"]))
+        return upper_batch(texts)
+
+    scheduler = make_scheduler(batch_fn, max_batch_size=8, max_wait_ms=50)
+    short = scheduler.submit(["a", "b"], max_length=10)
+    long = scheduler.submit(["c"], max_length=20)
+
+    assert [fut.result(timeout=5) for fut in short + long] == ["A", "B", "C"]
+    assert sorted(calls) == [(["a", "b"], 10), (["c"], 20)]
+
+
+def test_failed_batch_is_retried_item_by_item(make_scheduler):
+    def batch_fn(texts, **params):
+        if "ruim" in texts:
+            raise ValueError("chunk inválido")
+        return upper_batch(texts)
+
+    scheduler = make_scheduler(batch_fn, max_batch_size=8, max_wait_ms=50)
+    ok, bad, other = scheduler.submit(["ok", "ruim", "outro"])
+
+    assert ok.result(timeout=5) == "OK"
+    assert other.result(timeout=5) == "OUTRO"
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+
+
+def test_too_few_results_fail_the_leftover_futures(make_scheduler):
+    scheduler = make_scheduler(lambda texts, **params: ["só um"], max_batch_size=8, max_wait_ms=50)
+    first, second, third = scheduler.submit(["a", "b", "c"])
+
+    assert first.result(timeout=5) == "só um"
+    for fut in (second, third):
+        with pytest.raises(RuntimeError):
+            fut.result(timeout=5)
+
+
+def test_cancelled_items_are_dropped_before_their_batch_runs(make_scheduler):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def batch_fn(texts, **params):
+        calls.append(list(texts))
+        started.set()
+        release.wait(5)
+        return upper_batch(texts)
+
+    # lotes de 1: o primeiro prende a thread enquanto os outros ainda não começaram
+    scheduler = make_scheduler(batch_fn, max_batch_size=1, max_wait_ms=0)
+    first, second, third = scheduler.submit(["a", "bb", "ccc"])
+    assert started.wait(5)
+
+    assert not first.cancel()  # já está rodando
+    assert second.cancel()
+    assert third.cancel()
+    release.set()
+
+    assert first.result(timeout=5) == "A"
+    scheduler.close()
+    assert calls == [["a"]]
+
+
+def test_batch_limit_gets_the_first_item_out_before_the_rest(make_scheduler):
+    calls = []
+    done_at = {}
+
+    def batch_fn(texts, **params):
+        calls.append(list(texts))
+        time.sleep(0.1)
+        return upper_batch(texts)
+
+    scheduler = make_scheduler(batch_fn, max_batch_size=8, max_wait_ms=50)
+    start = time.perf_counter()
+    # itens de outra requisição já na fila não atrasam o lote limitado
+    others = scheduler.submit(["x", "y"])
+    futures = scheduler.submit(["a"], batch_limit=1) + scheduler.submit(["b", "c", "d"])
+    for fut in futures + others:
+        fut.add_done_callback(lambda f: done_at.setdefault(f, time.perf_counter() - start))
+
+    assert [fut.result(timeout=5) for fut in futures] == ["A", "B", "C", "D"]
+    assert calls[0] == ["a"]
+    assert sorted(calls[1]) == ["b", "c", "d", "x", "y"]
+    assert done_at[futures[0]] < done_at[futures[-1]]
+
+
+def test_submit_after_close_raises(make_scheduler):
+    scheduler = make_scheduler(upper_batch)
+    scheduler.close()
+    with pytest.raises(RuntimeError):
+        scheduler.submit(["a"])
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+import benchmark
+
+
+def write_lines(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def result(doc_id, total_s=0.1, **extra):
+    return {
+        "id": doc_id, "tokens_entrada": 100, "tokens_gerados": 20,
+        "tempos_s": {"clean_html": total_s / 2, "total": total_s}, "rss_mb": 300.0, **extra,
+    }
+
+
+def test_read_results_skips_truncated_lines_and_errored_documents(tmp_path):
+    path = tmp_path / "resultados.jsonl"
+    write_lines(path, [
+        json.dumps(result("a")),
+        json.dumps(result("b", erro="falhou")),
+        json.dumps(result("c")),
+        # execução interrompida no meio da gravação
+        json.dumps(result("d"))[:25],
+    ])
+
+    assert [r["id"] for r in benchmark.read_results(path)] == ["a", "c"]
+
+
+def test_read_results_keeps_the_last_record_of_each_document(tmp_path):
+    path = tmp_path / "resultados.jsonl"
+    write_lines(path, [
+        json.dumps(result("a", erro="falhou")),
+        json.dumps(result("a", resumo="segunda tentativa")),
+        json.dumps(result("b")),
+        json.dumps(result("b", erro="falhou de novo")),
+    ])
+
+    results = benchmark.read_results(path)
+
+    # "a" deu certo na segunda tentativa; "b" falhou por último e será processado de novo
+    assert [(r["id"], r.get("resumo")) for r in results] == [("a", "segunda tentativa")]
+
+
+def test_read_results_without_checkpoint(tmp_path):
+    assert benchmark.read_results(tmp_path / "nao_existe.jsonl") == []
+
+
+@pytest.mark.parametrize("p, expected", [(0, 1), (50, 3), (90, 5), (99, 5), (100, 5)])
+def test_percentile(p, expected):
+    assert benchmark.percentile([5, 1, 4, 2, 3], p) == expected
+
+
+def test_percentile_of_nothing():
+    assert benchmark.percentile([], 50) is None
+
+
+def test_build_report_uses_only_the_current_run_for_throughput():
+    resumed = [result("a", total_s=0.1), result("b", total_s=0.3)]
+    new = [result("c", total_s=0.2), result("d", erro="falhou")]
+
+    report = benchmark.build_report(resumed + new, new, elapsed_s=2.0)
+
+    assert report["documentos"] == 4
+    assert report["erros"] == 1
+    assert report["processados_nesta_execucao"] == 2
+    assert report["docs_por_s"] == 1.0
+    # só o documento "c" (sem erro) desta execução entra nos tokens por segundo
+    assert report["tokens_entrada_por_s"] == 50.0
+    assert report["tokens_gerados_por_s"] == 10.0
+    # latência: todos os documentos sem erro, inclusive os retomados do checkpoint
+    assert report["latencia_ms"]["total"] == {"p50": 200.0, "p90": 300.0, "p99": 300.0, "media": 200.0}
+    assert report["latencia_ms"]["clean_html"]["p50"] == 100.0
+    assert report["pico_rss_worker_mb"] == 300.0
+    assert "rouge" not in report
+
+
+def test_build_report_averages_rouge():
+    results = [
+        result("a", rouge={"rouge1": 0.5, "rouge2": 0.2, "rougeL": 0.4}),
+        result("b", rouge={"rouge1": 0.3, "rouge2": 0.0, "rougeL": 0.2}),
+    ]
+
+    report = benchmark.build_report(results, [], elapsed_s=0)
+
+    assert report["rouge"] == {"rouge1": 0.4, "rouge2": 0.1, "rougeL": 0.3}
+    assert "docs_por_s" not in report
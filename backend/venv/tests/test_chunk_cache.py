@@ -0,0 +1,100 @@
+import sqlite3
+
+from chunk_cache import ChunkCache, make_key
+
+
+def size(key, value):
+    return len(key) + len(value.encode("utf-8"))
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    # cabem exatamente duas entradas de 2 bytes
+    cache = ChunkCache(max_bytes=4)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"  # "a" passa a ser a mais recente
+
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+    assert stats["bytes"] == size("a", "1") + size("c", "3")
+
+
+def test_hit_and_miss_counters():
+    cache = ChunkCache(max_bytes=1024)
+    assert cache.get("x") is None
+    cache.put("x", "resumo")
+    assert cache.get("x") == "resumo"
+    assert cache.get("x") == "resumo"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["disk_hits"]) == (2, 1, 0)
+    assert stats["persistent"] is False
+
+
+def test_replacing_a_key_does_not_double_count_bytes():
+    cache = ChunkCache(max_bytes=1024)
+    cache.put("k", "curto")
+    cache.put("k", "um pouco maior")
+    assert cache.stats()["bytes"] == size("k", "um pouco maior")
+
+
+def test_entry_larger_than_the_cache_is_not_kept_in_memory():
+    cache = ChunkCache(max_bytes=4)
+    cache.put("k", "grande demais")
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_disk_layer_survives_a_new_instance(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    ChunkCache(max_bytes=1024, db_path=db_path).put("k", "resumo")
+
+    cache = ChunkCache(max_bytes=1024, db_path=db_path)
+    assert cache.get("k") == "resumo"
+    assert cache.get("k") == "resumo"  # a segunda vem da memória
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["entries"]) == (2, 1, 1)
+
+
+def test_key_ignores_whitespace_but_not_params():
+    params = {"max_length": 200, "min_length": 80}
+    key = make_key("um  texto\n qualquer ", "modelo", **params)
+    assert key == make_key("um texto qualquer", "modelo", **params)
+    assert key != make_key("um texto qualquer", "outro-modelo", **params)
+    assert key != make_key("um texto qualquer", "modelo", max_length=100, min_length=80)
+
+
+def test_disk_layer_keeps_at_most_max_rows(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    cache = ChunkCache(max_bytes=1024, db_path=db_path, max_rows=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, "resumo " + key)
+    cache.put("b", "resumo b de novo")  # regravar conta como gravação recente
+    cache.put("d", "resumo d")
+
+    fresh = ChunkCache(max_bytes=1024, db_path=db_path)
+    assert [fresh.get(key) for key in ("a", "b", "c", "d")] == [None, "resumo b de novo", None, "resumo d"]
+
+
+def test_disk_failures_become_misses(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    cache = ChunkCache(max_bytes=1024, db_path=db_path)
+    # outro processo estraga o arquivo: toda consulta ao SQLite passa a levantar OperationalError
+    other = sqlite3.connect(db_path)
+    other.execute("DROP TABLE resumos")
+    other.commit()
+    other.close()
+
+    assert cache.get("k") is None
+    cache.put("k", "resumo")  # não levanta: a entrada fica só na memória
+    assert cache.get("k") == "resumo"
+
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"], stats["disk_errors"]) == (1, 1, 2)
@@ -0,0 +1,59 @@
+import pytest
+
+setup_pln = pytest.importorskip("setup_pln")
+
+# (html, texto esperado de extract_text)
+CASES = [
+    ("<p>Olá mundo</p>", "Olá mundo"),
+    # tag vazia (void) nas SKIP_TAGS não engole o texto seguinte
+    ('<p>antes <img src="x.png"> depois</p>', "antes depois"),
+    # SKIP_TAGS aninhadas: o header inteiro sai, inclusive o nav de dentro
+    ("<header><nav><a>menu</a></nav>título do site</header><p>conteúdo</p>", "conteúdo"),
+    # texto depois de uma tag ignorada continua no resultado
+    ("<p>começo<script>var x = 1;</script>fim</p>", "começo fim"),
+    ("<div>a<style>p { color: red }</style>b<footer>rodapé</footer>c</div>", "a b c"),
+    # comentários não entram no texto, mas separam os nós ao redor
+    ("<p>antes<!-- comentário -->depois</p>", "antes depois"),
+    # entidades viram os caracteres correspondentes
+    ("<p>P&amp;D &eacute; caro &lt;sempre&gt;</p>", "P&D é caro <sempre>"),
+    # espaços nas pontas de cada nó de texto são removidos
+    ("<p>  um  </p>\n\n<p>\tdois </p>", "um dois"),
+    ("", ""),
+    ("   \n\t ", ""),
+    ("<!-- só um comentário -->", ""),
+]
+
+
+@pytest.mark.parametrize("html, expected", CASES)
+def test_extract_text(html, expected):
+    assert setup_pln.extract_text(html) == expected
+
+
+@pytest.mark.parametrize("html, expected", CASES)
+def test_extract_text_matches_beautifulsoup(html, expected):
+    # comportamento anterior de clean_html: BeautifulSoup + decompose() + get_text
+    bs4 = pytest.importorskip("bs4")
+    soup = bs4.BeautifulSoup(html, "lxml")
+    for tag in soup(sorted(setup_pln.SKIP_TAGS)):
+        tag.decompose()
+    assert setup_pln.extract_text(html) == soup.get_text(separator=" ", strip=True)
+
+
+def test_extract_text_accepts_pieces_split_inside_tags_and_entities():
+    pieces = ["<p>ol", "á</p><scr", "ipt>var x = 1;</scr", "ipt><p>P&am", "p;D</p>"]
+    assert setup_pln.extract_text(iter(pieces)) == "olá P&D"
+
+
+def test_extract_text_iterable_of_empty_pieces():
+    assert setup_pln.extract_text(iter(["", ""])) == ""
+
+
+def test_resumir_empty_html_returns_friendly_message():
+    setup_pln.load_model()
+    if not setup_pln.model_ready.is_set():
+        pytest.skip(setup_pln.startup_error)
+
+    response = setup_pln.app.test_client().post("/resumir", json={"html": ""})
+
+    assert response.status_code == 200
+    assert response.get_json() == {"resumo": "Não foi possível extrair texto relevante da página."}
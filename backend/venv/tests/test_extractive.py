@@ -0,0 +1,61 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+
+import extractive  # noqa: E402
+
+
+def topic_sentences():
+    # a última sentença repete o tema de todas as outras: é a mais central do grafo
+    sentences = [f"assunto{i} detalhe{i} exemplo{i} contexto{i}" for i in range(6)]
+    sentences.append(" ".join(f"assunto{i}" for i in range(6)))
+    return sentences
+
+
+def test_most_connected_sentence_gets_the_highest_score():
+    scores = extractive.sentence_scores(topic_sentences())
+    assert int(np.argmax(scores)) == 6
+
+
+def test_textrank_handles_isolated_sentences():
+    sim = np.zeros((3, 3))
+    scores = extractive.textrank(sim)
+    assert np.allclose(scores, 1 / 3)
+
+
+def test_only_max_ranked_sentences_enter_the_graph(monkeypatch):
+    sizes = []
+    real_textrank = extractive.textrank
+
+    def recording_textrank(sim, **kwargs):
+        sizes.append(sim.shape)
+        return real_textrank(sim, **kwargs)
+
+    monkeypatch.setattr(extractive, "textrank", recording_textrank)
+    sentences = [f"tema comum parte{i} item{i}" for i in range(50)]
+
+    scores = extractive.sentence_scores(sentences, max_ranked=10)
+
+    assert sizes == [(10, 10)]
+    assert (scores >= 0).sum() == 10
+    assert (scores == -1).sum() == 40
+
+
+def test_empty_vocabulary_keeps_original_order():
+    sentences = ["1 2 3", "4 5 6", "7 8 9"]
+    kept, _ = extractive.select_sentences(sentences, [3, 3, 3], top_k=2)
+    assert kept == [0, 1]
+
+
+def test_select_sentences_respects_budget_and_keeps_document_order():
+    sentences = topic_sentences()
+    kept, scores = extractive.select_sentences(sentences, [4] * 6 + [6], budget=10)
+    assert len(scores) == len(sentences)
+    assert kept == sorted(kept)
+    assert 6 in kept
+    assert sum(([4] * 6 + [6])[i] for i in kept) <= 10
+
+
+def test_nothing_is_ranked_when_everything_fits():
+    assert extractive.select_sentences(["a b", "c d"], [2, 2], budget=10) == ([0, 1], None)
@@ -0,0 +1,70 @@
+from metrics import Metrics
+
+
+def test_observe_fills_every_bucket_at_or_above_the_value():
+    metrics = Metrics()
+    metrics.observe("resumo_chunks_per_request", 3)
+    metrics.observe("resumo_chunks_per_request", 40)
+
+    text = metrics.render()
+
+    assert 'resumo_chunks_per_request_bucket{le="2"} 0' in text
+    assert 'resumo_chunks_per_request_bucket{le="3"} 1' in text
+    assert 'resumo_chunks_per_request_bucket{le="32"} 1' in text
+    # acima do último bucket só entra no +Inf
+    assert 'resumo_chunks_per_request_bucket{le="+Inf"} 2' in text
+    assert "resumo_chunks_per_request_sum 43" in text
+    assert "resumo_chunks_per_request_count 2" in text
+
+
+def test_render_follows_the_prometheus_text_format():
+    metrics = Metrics()
+    metrics.observe("resumo_stage_seconds", 0.02, stage="clean_html")
+    metrics.inc("resumo_requests_total", status=200)
+    metrics.inc("resumo_requests_total", status=200)
+
+    lines = metrics.render().splitlines()
+
+    assert "# HELP resumo_stage_seconds Duração de cada etapa do pipeline (segundos)" in lines
+    assert "# TYPE resumo_stage_seconds histogram" in lines
+    assert "# TYPE resumo_requests_total counter" in lines
+    assert 'resumo_stage_seconds_bucket{stage="clean_html",le="0.025"} 1' in lines
+    assert 'resumo_stage_seconds_count{stage="clean_html"} 1' in lines
+    assert 'resumo_requests_total{status="200"} 2' in lines
+    # cada amostra é "nome{rótulos} valor"
+    for line in lines:
+        if not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            float(value)
+            assert " " not in name
+
+
+def test_drain_empties_the_registry_and_merge_adds_it_back():
+    worker = Metrics()
+    worker.observe("resumo_chunks_per_request", 2)
+    worker.inc("resumo_generated_tokens_total", 10)
+
+    central = Metrics()
+    central.observe("resumo_chunks_per_request", 5)
+    central.inc("resumo_generated_tokens_total", 5)
+    central.merge(worker.drain())
+
+    assert worker.drain() == {"histograms": {}, "counters": {}}
+    text = central.render()
+    assert "resumo_chunks_per_request_count 2" in text
+    assert "resumo_chunks_per_request_sum 7" in text
+    assert 'resumo_chunks_per_request_bucket{le="2"} 1' in text
+    assert "resumo_generated_tokens_total 15" in text
+
+
+def test_merge_copies_histograms_instead_of_sharing_them():
+    worker = Metrics()
+    worker.observe("resumo_chunks_per_request", 1)
+    snapshot = worker.drain()
+
+    central = Metrics()
+    central.merge(snapshot)
+    central.observe("resumo_chunks_per_request", 1)
+
+    counts = snapshot["histograms"][("resumo_chunks_per_request", ())][0]
+    assert counts[0] == 1
@@ -0,0 +1,131 @@
+import json
+import time
+import uuid
+
+import pytest
+
+from batch_scheduler import BatchScheduler
+
+setup_pln = pytest.importorskip("setup_pln")
+
+
+@pytest.fixture(scope="module")
+def app_client():
+    # os dados do NLTK não são baixados em tempo de execução (ver check_nltk_resources)
+    try:
+        setup_pln.check_nltk_resources()
+    except RuntimeError as e:
+        pytest.skip(str(e))
+
+    setup_pln.load_model()
+    assert setup_pln.model_ready.is_set(), setup_pln.startup_error
+    return setup_pln.app.test_client()
+
+
+def sentence(i, words):
+    # palavras distintas por sentença, para o TextRank ter o que comparar
+    return " ".join(f"economia{i} inflação{i % 3} mercado{j}" for j in range(words // 3)) + "."
+
+
+PAGE = "<html><head><script>var x = 1;</script></head><body><nav>menu</nav>" + "".join(
+    f"<p>O relatório {i} mostra que a economia brasileira cresceu no trimestre, "
+    f"impulsionada pelo consumo das famílias e pelos investimentos em infraestrutura.</p>"
+    for i in range(40)
+) + "</body></html>"
+
+
+def topic_page(n, words):
+    # a última sentença cita o assunto de todas as outras: é a mais central, mas fica no fim do texto
+    sentences = [
+        f"assunto{i} " + " ".join(f"detalhe{i}x{j}" for j in range(words - 1)) + "." for i in range(n - 1)
+    ]
+    topics = " ".join(f"assunto{i}" for i in range(n - 1))
+    sentences.append(topics + " " + " ".join(f"resumo{j}" for j in range(words - n)) + ".")
+    return sentences
+
+
+def test_preselect_cap_drops_the_lowest_scored_sentences(app_client, monkeypatch):
+    monkeypatch.setattr(setup_pln, "EXTRACTIVE_MAX_CHUNKS", 2)
+    # sem tokenizador (stub) a capacidade é de 150 palavras: duas sentenças de ~100 palavras
+    # não cabem juntas, então o orçamento de 300 palavras abre um chunk a mais que o limite
+    sentences = topic_page(10, 99)
+
+    chunks, info = setup_pln.preselect_chunks(sentences)
+
+    assert len(chunks) == 2
+    # a sentença mais central sobrevive, mesmo sendo a última do texto
+    assert chunks[-1] == sentences[-1]
+    assert chunks[0] == sentences[0]
+    assert info["sentencas_total"] == 10
+    assert info["sentencas_descartadas"] == 8
+    assert info["chunks_descartados"] == 10 - len(chunks)
+
+
+def test_preselect_cap_ranks_even_when_everything_fit_the_budget(app_client, monkeypatch):
+    monkeypatch.setattr(setup_pln, "EXTRACTIVE_MAX_CHUNKS", 2)
+    # 3 x 76 palavras cabem no orçamento (300), mas não em 2 chunks de 150
+    sentences = topic_page(3, 76)
+
+    chunks, info = setup_pln.preselect_chunks(sentences)
+
+    assert chunks == [sentences[0], sentences[2]]
+    assert info["sentencas_descartadas"] == 1
+
+
+def test_preselect_respects_top_k(app_client):
+    sentences = [sentence(i, 12) for i in range(10)]
+
+    chunks, info = setup_pln.preselect_chunks(sentences, top_k=3)
+
+    kept = sum(1 for sent in sentences if any(sent in chunk for chunk in chunks))
+    assert kept == 3
+    assert info["sentencas_descartadas"] == 7
+
+
+@pytest.mark.parametrize("payload", [{}, ["html"], {"html": "<p>x</p>", "max_sentencas": 0}])
+def test_resumir_rejects_invalid_requests(app_client, payload):
+    assert app_client.post("/resumir", json=payload).status_code == 400
+
+
+def test_resumir_end_to_end(app_client):
+    response = app_client.post("/resumir", json={"html": PAGE})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["resumo_coeso"]
+    assert "var x" not in body["resumo_coeso"]
+    assert body["extrativo"]["sentencas_total"] == 40
+
+
+def test_resumir_stream_sends_chunks_then_final(app_client):
+    response = app_client.post("/resumir/stream", json={"html": PAGE})
+
+    assert response.status_code == 200
+    messages = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert messages[-1]["tipo"] == "final"
+    chunks = [m for m in messages if m["tipo"] == "chunk"]
+    assert chunks and sorted(m["indice"] for m in chunks) == list(range(chunks[0]["total"]))
+    # o texto final segue a ordem original dos chunks
+    by_index = {m["indice"]: m["resumo"] for m in chunks}
+    assert messages[-1]["resumo_coeso"] == " ".join(by_index[i] for i in range(len(by_index)))
+
+
+def test_stream_first_chunk_is_ready_before_the_last(app_client, monkeypatch):
+    def slow_batch(texts, **params):
+        time.sleep(0.2)
+        return [text[:20] for text in texts]
+
+    scheduler = BatchScheduler(slow_batch, max_batch_size=8, max_wait_ms=20)
+    monkeypatch.setattr(setup_pln, "scheduler", scheduler)
+    # textos novos a cada execução: nada pode vir do cache
+    chunks = [f"chunk {i} {uuid.uuid4().hex}" for i in range(4)]
+
+    try:
+        arrivals = [(i, elapsed) for i, _, elapsed in setup_pln.iter_chunk_summaries(chunks, first_alone=True)]
+    finally:
+        scheduler.close()
+
+    assert arrivals[0][0] == 0
+    assert sorted(i for i, _ in arrivals) == [0, 1, 2, 3]
+    # o primeiro chunk sai num lote só dele, um lote inteiro antes dos demais
+    assert arrivals[-1][1] - arrivals[0][1] >= 150
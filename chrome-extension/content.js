@@ -169,35 +169,87 @@ resumoButton.addEventListener("click", () => {
   }
 
   output.innerHTML = "Gerando resumo...";
-  fetch("http://127.0.0.1:5000/resumir", {
+
+  // ----------------------------
+  // Renderiza o resumo coeso geral dividido em parágrafos
+  // ----------------------------
+  function renderResumoFinal(data) {
+    output.innerHTML = "";
+
+    const coesoTitle = document.createElement("div");
+    coesoTitle.className = "section-title";
+    coesoTitle.textContent = "Resumo Geral";
+    output.appendChild(coesoTitle);
+
+    const resumo = data.resumo_coeso || "Resumo não disponível.";
+    resumo.split(/(?<=\.)\s+/).forEach(paragrafo => {
+      const p = document.createElement("div");
+      p.className = "section-summary";
+      p.textContent = paragrafo.trim();
+      output.appendChild(p);
+    });
+  }
+
+  // ----------------------------
+  // Mostra cada trecho assim que o servidor o resume (na ordem original do texto)
+  // ----------------------------
+  const parciais = [];
+  function renderParcial(msg) {
+    parciais[msg.indice] = msg.resumo;
+    output.innerHTML = "";
+
+    const status = document.createElement("div");
+    status.className = "section-title";
+    status.textContent = `Gerando resumo... (${parciais.filter(Boolean).length}/${msg.total})`;
+    output.appendChild(status);
+
+    parciais.forEach(resumo => {
+      if (!resumo) return;
+      const p = document.createElement("div");
+      p.className = "section-summary";
+      p.textContent = resumo;
+      output.appendChild(p);
+    });
+  }
+
+  function handleMensagem(msg) {
+    if (msg.tipo === "chunk") {
+      renderParcial(msg);
+    } else if (msg.tipo === "final" && msg.resumo_coeso) {
+      renderResumoFinal(msg);
+    } else {
+      output.textContent = msg.resumo || "Erro: resposta inesperada do servidor.";
+    }
+  }
+
+  // resposta em NDJSON: uma mensagem JSON por linha
+  fetch("http://127.0.0.1:5000/resumir/stream", {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify({ html: texto })
   })
-    .then(res => res.json())
-    .then(data => {
-      if (!data || !data.resumo_coeso) {
+    .then(async res => {
+      if (!res.ok || !res.body) {
         output.textContent = "Erro: resposta inesperada do servidor.";
         return;
       }
 
-      output.innerHTML = "";
-
-      // ----------------------------
-      // Resumo coeso geral dividido em parágrafos
-      // ----------------------------
-      const coesoTitle = document.createElement("div");
-      coesoTitle.className = "section-title";
-      coesoTitle.textContent = "Resumo Geral";
-      output.appendChild(coesoTitle);
-
-      const resumo = data.resumo_coeso || "Resumo não disponível.";
-      resumo.split(/(?<=\.)\s+/).forEach(paragrafo => {
-        const p = document.createElement("div");
-        p.className = "section-summary";
-        p.textContent = paragrafo.trim();
-        output.appendChild(p);
-      });
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const linhas = buffer.split("\n");
+        buffer = linhas.pop();  // última linha pode estar incompleta
+
+        linhas.filter(l => l.trim()).forEach(l => handleMensagem(JSON.parse(l)));
+      }
+
+      if (buffer.trim()) handleMensagem(JSON.parse(buffer));
     })
     .catch(err => {
       output.textContent = "Erro de conexão: " + err;
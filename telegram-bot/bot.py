@@ -1,26 +1,215 @@
-import telebot
+import codecs
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import Future
+
 import requests
+import telebot
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# configuração por variáveis de ambiente (permite apontar para um backend stub e
+# para uma API do Telegram falsa durante os testes)
+API_KEY = os.environ.get("TELEGRAM_API_KEY", "CHAVE_DO_TELEGRAM")
+BACKEND_URL = os.environ.get("BACKEND_URL", "http://localhost:5000/resumir")
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL", "https://api.telegram.org")
+
+# número de mensagens processadas ao mesmo tempo
+MAX_CONCURRENCY = int(os.environ.get("BOT_MAX_CONCURRENCY", "8"))
+# timeouts (segundos) de conexão e de leitura nas chamadas HTTP
+CONNECT_TIMEOUT = float(os.environ.get("BOT_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("BOT_READ_TIMEOUT", "120"))
+# tentativas extras (com backoff exponencial): downloads repetem falhas de conexão e
+# respostas 429/502/503/504; o POST ao backend, que é caro, só falhas de conexão e 429/503 com Retry-After
+MAX_RETRIES = int(os.environ.get("BOT_MAX_RETRIES", "3"))
+RETRY_BACKOFF = float(os.environ.get("BOT_RETRY_BACKOFF", "0.5"))
+# tamanho máximo de documento aceito (bytes)
+MAX_DOCUMENT_BYTES = int(os.environ.get("BOT_MAX_DOCUMENT_BYTES", str(5 * 1024 * 1024)))
+
+# limite de caracteres de uma mensagem do Telegram
+TELEGRAM_MESSAGE_LIMIT = 4096
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+PROCESSING_TEXT = "Processando... isso pode levar alguns segundos."
+ERROR_TEXT = "Erro ao gerar resumo."
+
+
+# URLs e caminhos com o token do bot (ex.: /file/bot<token>/...); o urllib3 mostra só o
+# caminho nas mensagens de erro, então o host não basta para achar a URL
+_URL_RE = re.compile(r"https?://\S+|/(?:file/)?bot[^/\s]+/\S*")
+
+
+class DocumentTooLarge(Exception):
+    pass
+
+
+def safe_error(e):
+    """Descrição do erro para o log, sem URLs (que podem conter o token do bot)."""
+    return _URL_RE.sub("<url>", f"{type(e).__name__}: {e}")
+
+
+def download_retry():
+    """Retry dos downloads (GET idempotente): conexão, leitura e 429/502/503/504."""
+    return Retry(
+        total=MAX_RETRIES,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        raise_on_status=False,  # depois da última tentativa, devolve a resposta em vez de levantar
+    )
+
+
+def backend_retry():
+    """
+    Retry do POST ao backend. Gerar um resumo é caro: um timeout de leitura ou um 504
+    significa que o backend pode ainda estar trabalhando, e repetir só multiplicaria a carga.
+    Repete apenas falhas de conexão (a requisição nem chegou) e 429/503 com Retry-After
+    (o backend recusou na admissão, sem gastar inferência).
+    """
+    return Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=0,
+        backoff_factor=RETRY_BACKOFF,
+        # sem status_forcelist: o urllib3 só repete 429/503 quando vem o Retry-After
+        status_forcelist=None,
+        allowed_methods=["POST"],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def create_session(pool_size, retry):
+    """Sessão HTTP com conexões keep-alive reaproveitadas, retry e backoff."""
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class BackendClient:
+    """
+    Cliente do backend de resumo.
+    Textos idênticos enviados ao mesmo tempo (por chats diferentes) viram uma única
+    chamada ao backend: as outras threads esperam o mesmo resultado.
+    """
+
+    def __init__(self, url, session):
+        self.url = url
+        self.session = session
+        self._lock = threading.Lock()
+        self._in_flight = {}  # hash do texto -> Future com o resumo
+
+    def summarize(self, text):
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            future.set_result(self._post(text))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+        return future.result()
+
+    def _post(self, text):
+        response = self.session.post(
+            self.url, json={"html": text}, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+        data = response.json()
+        # /resumir devolve "resumo_coeso" em caso de sucesso e "resumo"/"error" nas mensagens de aviso
+        return data.get("resumo_coeso") or data.get("resumo") or data.get("error") or ERROR_TEXT
+
+
+def download_text(session, url, max_bytes=MAX_DOCUMENT_BYTES):
+    """Baixa um documento em streaming, decodificando UTF-8 aos poucos e respeitando o limite de tamanho."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parts = []
+    received = 0
+
+    with session.get(url, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+        response.raise_for_status()
+        for piece in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+            received += len(piece)
+            if received > max_bytes:
+                raise DocumentTooLarge()
+            parts.append(decoder.decode(piece))
+
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+def split_message(text, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Divide textos maiores que o limite de uma mensagem do Telegram."""
+    return [text[i:i + limit] for i in range(0, len(text), limit)] or [ERROR_TEXT]
+
+
+def reply_processed(bot, message, produce):
+    """Responde "processando" na hora e depois troca a mensagem pelo resultado de produce()."""
+    status = bot.reply_to(message, PROCESSING_TEXT)
+    try:
+        result = produce()
+    except DocumentTooLarge:
+        result = f"Documento muito grande (limite de {MAX_DOCUMENT_BYTES // (1024 * 1024)} MB)."
+    except Exception as e:
+        print("Erro ao gerar resumo:", safe_error(e))
+        result = ERROR_TEXT
+
+    parts = split_message(result)
+    bot.edit_message_text(parts[0], chat_id=status.chat.id, message_id=status.message_id)
+    for part in parts[1:]:
+        bot.send_message(message.chat.id, part)
+
+
+def create_bot(token=API_KEY, backend_url=BACKEND_URL, api_url=TELEGRAM_API_URL, concurrency=MAX_CONCURRENCY):
+    # endereços da API do Telegram (trocáveis por uma API falsa em testes)
+    telebot.apihelper.API_URL = api_url + "/bot{0}/{1}"
+    telebot.apihelper.FILE_URL = api_url + "/file/bot{0}/{1}"
+
+    # threaded: as mensagens são tratadas por um pool de `concurrency` threads
+    bot = telebot.TeleBot(token, threaded=True, num_threads=concurrency)
+    session = create_session(concurrency, download_retry())
+    backend = BackendClient(backend_url, create_session(concurrency, backend_retry()))
+
+    @bot.message_handler(content_types=["text"])
+    def handle_text(message):
+        reply_processed(bot, message, lambda: backend.summarize(message.text))
 
-API_KEY = "CHAVE_DO_TELEGRAM"
-BACKEND_URL = "http://localhost:5000/summarize"
+    @bot.message_handler(content_types=["document"])
+    def handle_doc(message):
+        # recusa pelo tamanho informado pelo Telegram antes de baixar
+        if message.document.file_size and message.document.file_size > MAX_DOCUMENT_BYTES:
+            bot.reply_to(message, f"Documento muito grande (limite de {MAX_DOCUMENT_BYTES // (1024 * 1024)} MB).")
+            return
 
-bot = telebot.TeleBot(API_KEY)
+        def produce():
+            file_info = bot.get_file(message.document.file_id)
+            file_url = telebot.apihelper.FILE_URL.format(token, file_info.file_path)
+            text = download_text(session, file_url)
+            return backend.summarize(text)
 
-@bot.message_handler(content_types=["text"])
-def handle_text(message):
-    response = requests.post(BACKEND_URL, json={"text": message.text})
-    summary = response.json().get("summary", "Erro ao gerar resumo.")
-    bot.reply_to(message, summary)
+        reply_processed(bot, message, produce)
 
-@bot.message_handler(content_types=["document"])
-def handle_doc(message):
-    file_info = bot.get_file(message.document.file_id)
-    file_url = f"https://api.telegram.org/file/bot{API_KEY}/{file_info.file_path}"
-    text = requests.get(file_url).text
+    return bot
 
-    response = requests.post(BACKEND_URL, json={"text": text})
-    summary = response.json().get("summary", "Erro ao gerar resumo.")
-    bot.reply_to(message, summary)
 
-print("Bot rodando...")
-bot.infinity_polling()
+if __name__ == "__main__":
+    bot = create_bot()
+    print("Bot rodando...")
+    bot.infinity_polling()
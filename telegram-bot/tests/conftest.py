@@ -0,0 +1,87 @@
+# configuração comum dos testes do bot
+#
+# O bot é importado "solto" (`import bot`), como quando roda; por isso a pasta do bot entra
+# no sys.path. As chamadas HTTP vão para um servidor local (fixture `stub_server`) que faz
+# o papel do backend, do download de arquivos e da API do Telegram (TELEGRAM_API_URL).
+#
+# Uso (a partir de telegram-bot):
+#   python -m pytest tests
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubServer:
+    """
+    Servidor HTTP local. Cada rota é uma função (método, query, corpo) -> (status, headers, corpo);
+    corpos dict/list viram JSON. Todas as requisições recebidas ficam em `requests`.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def count(self, path):
+        with self._lock:
+            return sum(1 for _, p, _ in self.requests if p == path)
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _dispatch(self):
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with server._lock:
+                    server.requests.append((self.command, url.path, body))
+
+                route = server.routes.get(url.path)
+                if route is None:
+                    status, headers, payload = 404, {}, {"ok": False}
+                else:
+                    status, headers, payload = route(self.command, dict(parse_qsl(url.query)), body)
+                if isinstance(payload, (dict, list)):
+                    payload = json.dumps(payload).encode("utf-8")
+                    headers = {"Content-Type": "application/json", **headers}
+
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # o cliente desistiu (timeout)
+
+            do_GET = do_POST = _dispatch
+
+        return Handler
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("telebot")
+requests = pytest.importorskip("requests")
+
+import bot  # noqa: E402
+
+TOKEN = "123:TOKEN"
+
+
+def reply(status=200, payload=None, headers=None, delay=0):
+    """Rota do stub com resposta fixa (opcionalmente atrasada)."""
+    def route(method, query, body):
+        time.sleep(delay)
+        return status, headers or {}, {} if payload is None else payload
+    return route
+
+
+def backend_client(url):
+    return bot.BackendClient(url, bot.create_session(8, bot.backend_retry()))
+
+
+def test_identical_texts_sent_together_make_one_backend_call(stub_server):
+    stub_server.routes["/resumir"] = reply(payload={"resumo_coeso": "resumo"}, delay=0.3)
+    client = backend_client(stub_server.url + "/resumir")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.summarize("mesmo texto"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["resumo"] * 4
+    assert stub_server.count("/resumir") == 1
+
+
+def test_backend_504_is_not_retried(stub_server, monkeypatch):
+    monkeypatch.setattr(bot, "RETRY_BACKOFF", 0)
+    stub_server.routes["/resumir"] = reply(504, {"error": "Tempo limite excedido"})
+
+    assert backend_client(stub_server.url + "/resumir").summarize("texto") == "Tempo limite excedido"
+    assert stub_server.count("/resumir") == 1
+
+
+def test_backend_read_timeout_is_not_retried(stub_server, monkeypatch):
+    monkeypatch.setattr(bot, "RETRY_BACKOFF", 0)
+    monkeypatch.setattr(bot, "READ_TIMEOUT", 0.2)
+    stub_server.routes["/resumir"] = reply(payload={"resumo_coeso": "tarde demais"}, delay=1)
+
+    with pytest.raises(requests.exceptions.RequestException):
+        backend_client(stub_server.url + "/resumir").summarize("texto")
+    assert stub_server.count("/resumir") == 1
+
+
+def test_backend_503_with_retry_after_is_retried(stub_server, monkeypatch):
+    monkeypatch.setattr(bot, "RETRY_BACKOFF", 0)
+    answers = iter([
+        (503, {"Retry-After": "0"}, {"error": "Modelo ainda carregando"}),
+        (200, {}, {"resumo_coeso": "resumo"}),
+    ])
+    stub_server.routes["/resumir"] = lambda method, query, body: next(answers)
+
+    assert backend_client(stub_server.url + "/resumir").summarize("texto") == "resumo"
+    assert stub_server.count("/resumir") == 2
+
+
+def test_download_stops_at_the_size_limit(stub_server, monkeypatch):
+    monkeypatch.setattr(bot, "DOWNLOAD_CHUNK_BYTES", 100)
+    stub_server.routes["/doc.txt"] = reply(payload=b"a" * 10_000)
+    session = bot.create_session(2, bot.download_retry())
+
+    with pytest.raises(bot.DocumentTooLarge):
+        bot.download_text(session, stub_server.url + "/doc.txt", max_bytes=1000)
+    assert bot.download_text(session, stub_server.url + "/doc.txt", max_bytes=10_000) == "a" * 10_000
+
+
+def test_download_decodes_characters_split_between_pieces(stub_server, monkeypatch):
+    # pedaços de 1 byte: todo caractere acentuado (2 bytes em UTF-8) chega dividido
+    monkeypatch.setattr(bot, "DOWNLOAD_CHUNK_BYTES", 1)
+    text = "Ação, pé, ônibus e coração — 🙂"
+    stub_server.routes["/doc.txt"] = reply(payload=text.encode("utf-8"))
+
+    assert bot.download_text(bot.create_session(2, bot.download_retry()), stub_server.url + "/doc.txt") == text
+
+
+def test_safe_error_hides_urls_with_the_token():
+    error = requests.exceptions.ConnectionError(
+        f"HTTPSConnectionPool: Max retries exceeded with url: /file/bot{TOKEN}/docs/a.txt"
+    )
+    assert TOKEN not in bot.safe_error(error)
+
+
+def test_document_is_downloaded_summarized_and_answered(stub_server, monkeypatch):
+    # create_bot troca as URLs globais do telebot; o monkeypatch as restaura no fim
+    monkeypatch.setattr(bot.telebot.apihelper, "API_URL", bot.telebot.apihelper.API_URL)
+    monkeypatch.setattr(bot.telebot.apihelper, "FILE_URL", bot.telebot.apihelper.FILE_URL)
+    document = "Texto do documento, com acentuação.".encode("utf-8")
+    edited = threading.Event()
+    answers = {}
+
+    def message(query):
+        return 200, {}, {"ok": True, "result": {
+            "message_id": 2, "date": 0, "chat": {"id": int(query["chat_id"]), "type": "private"},
+            "text": query.get("text", ""),
+        }}
+
+    def edit(method, query, body):
+        answers["edit"] = query["text"]
+        edited.set()
+        return message(query)
+
+    def summarize(method, query, body):
+        answers["backend"] = json.loads(body)["html"]
+        return 200, {}, {"resumo_coeso": "resumo do documento"}
+
+    stub_server.routes.update({
+        f"/bot{TOKEN}/sendMessage": lambda method, query, body: message(query),
+        f"/bot{TOKEN}/editMessageText": edit,
+        f"/bot{TOKEN}/getFile": reply(payload={"ok": True, "result": {
+            "file_id": "f1", "file_unique_id": "u1", "file_size": len(document), "file_path": "docs/a.txt",
+        }}),
+        f"/file/bot{TOKEN}/docs/a.txt": reply(payload=document),
+        "/resumir": summarize,
+    })
+
+    telegram = bot.create_bot(TOKEN, stub_server.url + "/resumir", stub_server.url, concurrency=2)
+    update = bot.telebot.types.Update.de_json({"update_id": 1, "message": {
+        "message_id": 1, "date": 0, "chat": {"id": 42, "type": "private"},
+        "document": {"file_id": "f1", "file_unique_id": "u1", "file_size": len(document)},
+    }})
+    try:
+        telegram.process_new_updates([update])
+        assert edited.wait(5)
+    finally:
+        telegram.worker_pool.close()
+
+    assert answers["backend"] == document.decode("utf-8")
+    assert answers["edit"] == "resumo do documento"